@@ -0,0 +1,121 @@
+# app/comandos/archivar_lecturas.py
+"""
+Archiva las particiones mensuales de lectura_sesion más viejas que la retención: exporta
+cada una a un CSV comprimido en LECTURA_ARCHIVO_DIR, suma sus sesiones a
+lectura_resumen_archivado, la registra en lectura_archivo y la borra. lectura_resumen ya
+las incluye, así que los reportes no cambian.
+
+    python -m app.comandos.archivar_lecturas [--meses 24] [--dry-run]
+"""
+import os
+import gzip
+import argparse
+from datetime import date, datetime
+from sqlalchemy import text
+from sqlalchemy.dialects.postgresql import insert
+from sqlmodel import Session
+from app.database.database import engine
+from app.models.libro.lectura.modelo_lectura import LecturaSesion, LecturaResumenArchivado, LecturaArchivo
+from app.services.servicio_lectura import consulta_resumen, combinar_resumen, sumar_meses, COLUMNAS_RESUMEN
+from app.utils.archivo_utils import SUFIJO_TEMPORAL
+
+LECTURA_RETENCION_MESES = int(os.getenv("LECTURA_RETENCION_MESES", "24"))
+# Fuera de uploads, que se sirve como archivos estáticos
+LECTURA_ARCHIVO_DIR = os.getenv("LECTURA_ARCHIVO_DIR", os.path.join("archivos", "lecturas"))
+
+
+def particiones(session: Session) -> list:
+    """(mes, nombre) de las particiones de lectura_sesion, de la más vieja a la más nueva."""
+    nombres = session.exec(text(
+        "SELECT c.relname FROM pg_inherits i JOIN pg_class c ON c.oid = i.inhrelid "
+        "WHERE i.inhparent = 'lectura_sesion'::regclass"
+    )).scalars()
+    resultado = []
+    for nombre in nombres:
+        try:
+            resultado.append((datetime.strptime(nombre, "lectura_sesion_%Y_%m").date(), nombre))
+        except ValueError:
+            continue
+    return sorted(resultado)
+
+
+def exportar(session: Session, particion: str, ruta: str) -> int:
+    # COPY por la misma conexión (y transacción) que después borra la partición
+    cursor = session.connection().connection.cursor()
+    temporal = ruta + SUFIJO_TEMPORAL
+    with open(temporal, "wb") as archivo:
+        with gzip.open(archivo, "wt", encoding="utf-8", newline="") as destino:
+            cursor.copy_expert(f"COPY (SELECT * FROM {particion} ORDER BY ls_id) TO STDOUT WITH CSV HEADER", destino)
+        # El archivo debe estar en disco antes de borrar las filas
+        archivo.flush()
+        os.fsync(archivo.fileno())
+    os.replace(temporal, ruta)
+    return cursor.rowcount
+
+
+def archivar_particion(session: Session, mes: date, particion: str, carpeta: str):
+    """Devuelve las sesiones archivadas, o None si la partición todavía tiene sesiones abiertas."""
+    # Sin escrituras en la partición mientras se exporta
+    session.exec(text(f"LOCK TABLE {particion} IN SHARE MODE"))
+    if session.exec(text(f"SELECT 1 FROM {particion} WHERE ls_fecha_final IS NULL LIMIT 1")).first():
+        session.rollback()
+        return None
+
+    archivo = f"{particion}.csv.gz"
+    filas = exportar(session, particion, os.path.join(carpeta, archivo))
+    desde = datetime(mes.year, mes.month, 1)
+    hasta = datetime.combine(sumar_meses(mes, 1), datetime.min.time())
+    sesiones = consulta_resumen(LecturaSesion.ls_fecha_inicial >= desde, LecturaSesion.ls_fecha_inicial < hasta)
+    session.exec(combinar_resumen(
+        LecturaResumenArchivado, insert(LecturaResumenArchivado).from_select(COLUMNAS_RESUMEN, sesiones)
+    ))
+    session.add(LecturaArchivo(
+        la_particion=particion, la_desde=desde, la_hasta=hasta, la_filas=filas,
+        la_archivo=archivo, la_fecha=datetime.utcnow(),
+    ))
+    session.flush()
+    # DETACH bloquea lectura_sesion entera: si hay transacciones largas, mejor fallar y reintentar
+    session.exec(text("SET LOCAL lock_timeout = '5s'"))
+    session.exec(text(f"ALTER TABLE lectura_sesion DETACH PARTITION {particion}"))
+    session.exec(text(f"DROP TABLE {particion}"))
+    session.commit()
+    return filas
+
+
+def archivar(meses: int = LECTURA_RETENCION_MESES, dry_run: bool = False, carpeta: str = LECTURA_ARCHIVO_DIR) -> list:
+    hoy = date.today()
+    limite = sumar_meses(date(hoy.year, hoy.month, 1), -meses)
+    if not dry_run:
+        os.makedirs(carpeta, exist_ok=True)
+    archivadas = []
+    with Session(engine) as session:
+        for mes, particion in particiones(session):
+            if sumar_meses(mes, 1) > limite:
+                break
+            if dry_run:
+                archivadas.append((particion, None))
+                continue
+            filas = archivar_particion(session, mes, particion, carpeta)
+            if filas is None:
+                # Se archiva en orden: las siguientes esperan a que esta se pueda archivar
+                print(f"{particion} tiene sesiones abiertas; se deja para la próxima ejecución")
+                break
+            archivadas.append((particion, filas))
+    return archivadas
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Exporta y borra las particiones viejas de lectura_sesion.")
+    parser.add_argument("--meses", type=int, default=LECTURA_RETENCION_MESES,
+                        help="Meses completos que se conservan en la base, sin contar el actual")
+    parser.add_argument("--dry-run", action="store_true", help="Solo lista las particiones a archivar")
+    args = parser.parse_args()
+
+    archivadas = archivar(args.meses, args.dry_run)
+    for particion, filas in archivadas:
+        print(f"{particion}: {'se archivaría' if filas is None else f'{filas} sesiones archivadas'}")
+    print(f"{len(archivadas)} particiones {'a archivar' if args.dry_run else 'archivadas'}")
+
+
+if __name__ == "__main__":
+    main()
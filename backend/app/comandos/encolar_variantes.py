@@ -0,0 +1,26 @@
+# app/comandos/encolar_variantes.py
+"""
+Encola la generación de variantes para las portadas que todavía no las tienen
+(libros cargados antes de que existieran).
+
+    python -m app.comandos.encolar_variantes
+"""
+from sqlmodel import Session, select
+from app.database.database import engine
+from app.models.libro.modelo_libro import Libro
+from app.models.trabajo.modelo_trabajo import Trabajo
+from app.services.servicio_libro import TRABAJO_VARIANTES_PORTADA
+
+
+def main():
+    with Session(engine) as session:
+        libros = session.exec(
+            select(Libro.lib_id).where(Libro.lib_portada.isnot(None), Libro.lib_portada_anchos.is_(None))
+        ).all()
+        session.add_all(Trabajo(tra_tipo=TRABAJO_VARIANTES_PORTADA, tra_payload={"libro_id": libro_id}) for libro_id in libros)
+        session.commit()
+    print(f"{len(libros)} trabajos de variantes encolados")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,69 @@
+# app/comandos/limpiar_archivos.py
+"""
+Borra de uploads/books y uploads/covers los archivos que ningún libro referencia
+(incluidas las variantes de portadas que ya no se usan), además de los ".part"
+que quedaron de subidas interrumpidas.
+
+    python -m app.comandos.limpiar_archivos [--dry-run] [--gracia-horas 24]
+"""
+import os
+import time
+import argparse
+from sqlmodel import Session, select
+from app.database.database import engine
+from app.models.libro.modelo_libro import Libro
+from app.services.servicio_libro import CARPETA_LIBROS, CARPETA_PORTADAS
+from app.utils.archivo_utils import SUFIJO_TEMPORAL, GRACIA_ARCHIVOS_HORAS
+from app.utils.imagen_utils import es_variante_de
+
+
+def archivos_referenciados(session: Session) -> dict:
+    filas = session.exec(select(Libro.lib_url, Libro.lib_portada)).all()
+    return {
+        CARPETA_LIBROS: {url for url, _ in filas if url},
+        CARPETA_PORTADAS: {portada for _, portada in filas if portada},
+    }
+
+
+def candidatos(carpeta: str, referenciados: set, limite: float):
+    # Las variantes de portada (base_ancho.ext) viven mientras su portada esté referenciada
+    bases = {os.path.splitext(nombre)[0] for nombre in referenciados}
+    for entrada in os.scandir(carpeta):
+        if not entrada.is_file() or entrada.name in referenciados or es_variante_de(entrada.name, bases):
+            continue
+        # La gracia protege subidas recientes cuyo libro todavía no se guardó
+        if entrada.stat().st_mtime > limite:
+            continue
+        yield entrada
+
+
+def limpiar(dry_run: bool = False, gracia_horas: float = GRACIA_ARCHIVOS_HORAS) -> dict:
+    limite = time.time() - gracia_horas * 3600
+    with Session(engine) as session:
+        referencias = archivos_referenciados(session)
+
+    resumen = {"archivos": 0, "temporales": 0, "bytes": 0}
+    for carpeta, referenciados in referencias.items():
+        for entrada in candidatos(carpeta, referenciados, limite):
+            tipo = "temporales" if entrada.name.endswith(SUFIJO_TEMPORAL) else "archivos"
+            resumen[tipo] += 1
+            resumen["bytes"] += entrada.stat().st_size
+            print(f"{'[dry-run] ' if dry_run else ''}eliminando {entrada.path}")
+            if not dry_run:
+                os.remove(entrada.path)
+    return resumen
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Elimina archivos subidos que ningún libro referencia.")
+    parser.add_argument("--dry-run", action="store_true", help="Solo lista lo que se eliminaría")
+    parser.add_argument("--gracia-horas", type=float, default=GRACIA_ARCHIVOS_HORAS, help="No toca archivos modificados hace menos de estas horas")
+    args = parser.parse_args()
+
+    resumen = limpiar(args.dry_run, args.gracia_horas)
+    print(f"{resumen['archivos']} archivos sin referencia, {resumen['temporales']} temporales, "
+          f"{resumen['bytes'] / (1024 * 1024):.1f} MB {'a liberar' if args.dry_run else 'liberados'}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,102 @@
+# app/comandos/perfil_arranque.py
+"""
+Mide el arranque de la API en procesos nuevos: qué módulos cuestan más al importar
+app.main (python -X importtime) y cuánto tarda la primera petición, con el precalentamiento
+de la base que hace el lifespan. Sale con código 1 si se supera el presupuesto o si alguna dependencia pesada vuelve a cargarse al importar.
+
+    python -m app.comandos.perfil_arranque [--presupuesto-ms 2000] [--top 15]
+"""
+import os
+import sys
+import argparse
+import subprocess
+
+PRESUPUESTO_ARRANQUE_MS = int(os.getenv("PRESUPUESTO_ARRANQUE_MS", "2000"))
+
+# Se cargan bajo demanda (ver sdk_mercadopago, contexto_claves, imagen_utils, pdf_utils)
+DEPENDENCIAS_PEREZOSAS = {"mercadopago", "passlib", "httpx", "PIL", "pikepdf", "fitz"}
+
+PRIMERA_PETICION = """
+import time
+inicio = time.perf_counter()
+from fastapi.testclient import TestClient
+from app.main import app
+importado = time.perf_counter()
+with TestClient(app) as cliente:
+    cliente.get("/health/live")
+print("TIEMPOS_ARRANQUE", round(1000 * (importado - inicio)), round(1000 * (time.perf_counter() - inicio)))
+"""
+
+
+def _correr(*args) -> subprocess.CompletedProcess:
+    return subprocess.run([sys.executable, *args], capture_output=True, text=True, check=True)
+
+
+def modulos_importados() -> list:
+    """(módulo, profundidad, acumulado_us) de todo lo que importa app.main."""
+    salida = _correr("-X", "importtime", "-c", "import app.main").stderr
+    filas = []
+    for linea in salida.splitlines():
+        if not linea.startswith("import time:") or "cumulative" in linea:
+            continue
+        _, acumulado, nombre = linea.split("|")
+        nombre = nombre[1:]
+        profundidad = (len(nombre) - len(nombre.lstrip())) // 2
+        filas.append((nombre.strip(), profundidad, int(acumulado)))
+    # importtime lista cada módulo después de sus dependencias: las de app.main son las
+    # anteriores a su línea, hasta el módulo de nivel superior previo (p. ej. site)
+    fin = next(i for i, fila in enumerate(filas) if fila[0] == "app.main" and fila[1] == 0)
+    inicio = fin
+    while inicio > 0 and filas[inicio - 1][1] > 0:
+        inicio -= 1
+    return filas[inicio:fin + 1]
+
+
+def dependencias_cargadas(modulos: list) -> list:
+    return sorted({m[0].split(".")[0] for m in modulos} & DEPENDENCIAS_PEREZOSAS)
+
+
+def medir_primera_peticion() -> tuple:
+    """
+    (ms hasta importar app.main, ms hasta responder la primera petición) en un proceso nuevo.
+    La primera petición incluye el lifespan, es decir el precalentamiento de la base: con la
+    base caída se suma lo que tarde en fallar la conexión.
+    """
+    # La app también escribe en stdout al arrancar (avisos del lifespan, errores de tareas)
+    salida = _correr("-c", PRIMERA_PETICION).stdout.splitlines()
+    tiempos = next(linea for linea in reversed(salida) if linea.startswith("TIEMPOS_ARRANQUE "))
+    importacion_ms, primera_ms = map(int, tiempos.split()[1:])
+    return importacion_ms, primera_ms
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Perfil de importación y tiempo hasta la primera petición.")
+    parser.add_argument("--presupuesto-ms", type=int, default=PRESUPUESTO_ARRANQUE_MS,
+                        help="Tiempo máximo hasta responder la primera petición")
+    parser.add_argument("--top", type=int, default=15, help="Módulos más costosos a mostrar")
+    args = parser.parse_args()
+
+    modulos = modulos_importados()
+    print("Módulos más costosos (acumulado):")
+    # Solo los directos de app.main y los paquetes de nivel superior, para no repetir sus hijos
+    principales = [m for m in modulos if m[1] <= 1 or "." not in m[0]]
+    for nombre, _, acumulado in sorted(principales, key=lambda m: -m[2])[:args.top]:
+        print(f"  {acumulado / 1000:8.1f} ms  {nombre}")
+
+    cargadas = dependencias_cargadas(modulos)
+    importacion_ms, primera_ms = medir_primera_peticion()
+    print(f"Importar app.main: {importacion_ms} ms; primera petición: {primera_ms} ms "
+          f"(presupuesto {args.presupuesto_ms} ms)")
+
+    correcto = True
+    if cargadas:
+        print(f"FALLA: se importan al arrancar: {', '.join(cargadas)}")
+        correcto = False
+    if primera_ms > args.presupuesto_ms:
+        print("FALLA: se superó el presupuesto de arranque")
+        correcto = False
+    sys.exit(0 if correcto else 1)
+
+
+if __name__ == "__main__":
+    main()
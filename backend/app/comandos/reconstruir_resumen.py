@@ -0,0 +1,53 @@
+# app/comandos/reconstruir_resumen.py
+"""
+Recalcula lectura_resumen desde el historial de lectura_sesion más lo ya archivado
+(lectura_resumen_archivado), para todos los usuarios o solo para uno.
+
+    python -m app.comandos.reconstruir_resumen [--usuario ID]
+"""
+import argparse
+from sqlalchemy import delete, func, text
+from sqlalchemy.dialects.postgresql import insert
+from sqlmodel import Session, select
+from app.database.database import engine
+from app.models.libro.lectura.modelo_lectura import LecturaSesion, LecturaResumen, LecturaResumenArchivado
+from app.services.servicio_lectura import consulta_resumen, combinar_resumen, COLUMNAS_RESUMEN
+
+
+def reconstruir(usuario_id: int = None) -> int:
+    with Session(engine) as session:
+        # Una sola instantánea para las sesiones y lo archivado: si se archiva una partición en
+        # medio, sus sesiones no se cuentan dos veces
+        session.connection(execution_options={"isolation_level": "REPEATABLE READ"})
+        # Bloquea las escrituras (no las lecturas) del resumen mientras se recalcula; las sesiones
+        # que se finalicen mientras tanto se suman al liberar el bloqueo
+        session.exec(text("LOCK TABLE lectura_resumen IN EXCLUSIVE MODE"))
+        borrar = delete(LecturaResumen)
+        archivados = select(*(getattr(LecturaResumenArchivado, columna) for columna in COLUMNAS_RESUMEN))
+        contar = select(func.count()).select_from(LecturaResumen)
+        condiciones = []
+        if usuario_id is not None:
+            borrar = borrar.where(LecturaResumen.lr_idusuario == usuario_id)
+            archivados = archivados.where(LecturaResumenArchivado.lr_idusuario == usuario_id)
+            contar = contar.where(LecturaResumen.lr_idusuario == usuario_id)
+            condiciones.append(LecturaSesion.ls_idusuario == usuario_id)
+        session.exec(borrar)
+        session.exec(insert(LecturaResumen).from_select(COLUMNAS_RESUMEN, consulta_resumen(*condiciones)))
+        session.exec(
+            combinar_resumen(LecturaResumen, insert(LecturaResumen).from_select(COLUMNAS_RESUMEN, archivados))
+        )
+        filas = session.exec(contar).one()
+        session.commit()
+    return filas
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Reconstruye lectura_resumen desde las sesiones de lectura.")
+    parser.add_argument("--usuario", type=int, help="Solo el resumen de este usuario")
+    args = parser.parse_args()
+
+    print(f"{reconstruir(args.usuario)} resúmenes reconstruidos")
+
+
+if __name__ == "__main__":
+    main()
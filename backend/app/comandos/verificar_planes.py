@@ -0,0 +1,93 @@
+# app/comandos/verificar_planes.py
+"""
+Comprueba con EXPLAIN que las consultas más frecuentes usan sus índices
+(migración 0002) sobre una base con datos. Sale con código 1 si alguna no lo hace.
+
+    python -m app.comandos.verificar_planes
+"""
+import sys
+from datetime import datetime
+from sqlalchemy import text
+from sqlalchemy.dialects import postgresql
+from sqlmodel import Session, select
+from app.database.database import engine
+from app.models.compra.modelo_compra import Compra
+from app.models.libro.lectura.modelo_lectura import LecturaSesion
+from app.models.libro.progreso.modelo_progreso import ProgresoLectura
+
+
+def consultas(usuario_id: int = 1, libro_id: int = 1) -> list:
+    """(descripcion, consulta, índice esperado) de las consultas que se verifican."""
+    return [
+        (
+            "compra aprobada del usuario",
+            select(Compra).where(Compra.com_idusuario == usuario_id, Compra.com_idlibro == libro_id, Compra.com_estado == "approved"),
+            "ix_compra_usuario_libro_estado",
+        ),
+        (
+            "ventas aprobadas del mes",
+            select(Compra).where(Compra.com_fecha >= datetime(2000, 1, 1), Compra.com_estado == "approved"),
+            "ix_compra_aprobada_fecha",
+        ),
+        (
+            "progreso del usuario en el libro",
+            select(ProgresoLectura).where(ProgresoLectura.pro_idusuario == usuario_id, ProgresoLectura.pro_idlibro == libro_id),
+            "uq_progreso_usuario_libro",
+        ),
+        (
+            "sesión de lectura abierta",
+            select(LecturaSesion).where(
+                LecturaSesion.ls_idusuario == usuario_id, LecturaSesion.ls_idlibro == libro_id, LecturaSesion.ls_fecha_final.is_(None)
+            ),
+            "ix_lectura_abierta",
+        ),
+        (
+            "sesiones de lectura finalizadas",
+            select(LecturaSesion).where(
+                LecturaSesion.ls_idusuario == usuario_id, LecturaSesion.ls_idlibro == libro_id, LecturaSesion.ls_fecha_final.isnot(None)
+            ),
+            "ix_lectura_usuario_libro_final",
+        ),
+    ]
+
+
+def indices_del_plan(nodo: dict) -> set:
+    indices = {nodo["Index Name"]} if "Index Name" in nodo else set()
+    for hijo in nodo.get("Plans", []):
+        indices |= indices_del_plan(hijo)
+    return indices
+
+
+def preparar(session: Session):
+    # Estadísticas al día, o el planificador elige entre índices a ciegas
+    for tabla in ("compra", "progreso_lectura", "lectura_sesion"):
+        session.exec(text(f"ANALYZE {tabla}"))
+    # En tablas chicas el planificador prefiere recorrerlas enteras; así se ve si el índice sirve
+    session.exec(text("SET LOCAL enable_seqscan = off"))
+
+
+def indices_usados(session: Session, consulta) -> set:
+    sql = consulta.compile(dialect=postgresql.dialect(), compile_kwargs={"literal_binds": True})
+    plan = session.exec(text(f"EXPLAIN (FORMAT JSON) {sql}")).scalar()
+    # En tablas particionadas el plan nombra el índice de cada partición, no el declarado
+    return {
+        session.exec(text("SELECT coalesce(pg_partition_root(CAST(:indice AS regclass)), CAST(:indice AS regclass))::text"), params={"indice": nombre}).scalar()
+        for nombre in indices_del_plan(plan[0]["Plan"])
+    }
+
+
+def verificar() -> bool:
+    correcto = True
+    with Session(engine) as session:
+        preparar(session)
+        for descripcion, consulta, indice in consultas():
+            usados = indices_usados(session, consulta)
+            ok = indice in usados
+            correcto = correcto and ok
+            print(f"{'OK   ' if ok else 'FALLA'} {descripcion}: {indice} "
+                  f"(usa: {', '.join(sorted(usados)) or 'ninguno'})")
+    return correcto
+
+
+if __name__ == "__main__":
+    sys.exit(0 if verificar() else 1)
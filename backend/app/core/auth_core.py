@@ -2,7 +2,7 @@ from fastapi import Depends, HTTPException, status
 from sqlmodel import select
 from jose import jwt, JWTError
 from datetime import datetime, timedelta
-from passlib.context import CryptContext
+from functools import lru_cache
 from fastapi.security import OAuth2PasswordBearer
 from app.models.usuario.modelo_usuario import Usuario
 from sqlalchemy import or_, func
@@ -18,7 +18,6 @@ ALGORITHM = os.getenv("ALGORITHM")
 ACCESS_TOKEN_EXPIRE_MINUTES = int(os.getenv("ACCESS_TOKEN_EXPIRE_MINUTES"))
 REFRESH_TOKEN_EXPIRE_DAYS = int(os.getenv("REFRESH_TOKEN_EXPIRE_DAYS"))
 
-bcrypt_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
 oauth2_bearer = OAuth2PasswordBearer(tokenUrl="autenticacion/ingresar")
 
 
@@ -84,12 +83,19 @@ def generar_token_recuperacion(usu_id: int) -> str:
     )
 
 
+@lru_cache(maxsize=1)
+def contexto_claves():
+    # passlib/bcrypt solo se cargan cuando se verifica o genera una clave
+    from passlib.context import CryptContext
+    return CryptContext(schemes=["bcrypt"], deprecated="auto")
+
+
 def verificar_password(clave_plana: str, clave_hash: str) -> bool:
-    return bcrypt_context.verify(clave_plana, clave_hash)
+    return contexto_claves().verify(clave_plana, clave_hash)
 
 
 def hash_password(clave: str) -> str:
-    return bcrypt_context.hash(clave)
+    return contexto_claves().hash(clave)
 
 
 def refrescar_token(refresh_token: str) -> Dict[str, str]:
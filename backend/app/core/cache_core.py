@@ -0,0 +1,128 @@
+# app/core/cache_core.py
+import os
+import json
+import time
+import hashlib
+import threading
+from typing import Optional
+from fastapi import Request, Response
+from sqlmodel import select
+
+# Segundos que una entrada se considera válida (cubre cambios hechos desde otros workers)
+CACHE_REFERENCIAS_TTL = int(os.getenv("CACHE_REFERENCIAS_TTL", "300"))
+# max-age que se anuncia a los navegadores en los listados de referencia
+CACHE_REFERENCIAS_MAX_AGE = int(os.getenv("CACHE_REFERENCIAS_MAX_AGE", "60"))
+
+
+class _Entrada:
+    def __init__(self, version: int, filas: list, etag: str):
+        self.version = version
+        self.filas = filas
+        self.indice = {_clave(fila): fila for fila in filas}
+        self.etag = etag
+        self.cargado = time.monotonic()
+
+
+def _clave(fila):
+    columna = next(iter(type(fila).__table__.primary_key.columns))
+    return getattr(fila, columna.name)
+
+
+class CacheReferencias:
+    """
+    Caché en memoria de tablas de referencia que cambian poco (autor, categoría, editorial).
+    Cada modelo tiene una versión que se incrementa al invalidar; una entrada solo se usa
+    si se cargó con la versión vigente y no superó el TTL.
+    """
+
+    def __init__(self, ttl: int):
+        self._ttl = ttl
+        self._versiones: dict = {}
+        self._entradas: dict = {}
+        self._lock = threading.Lock()
+
+    def invalidar(self, modelo):
+        with self._lock:
+            self._versiones[modelo] = self._versiones.get(modelo, 0) + 1
+            self._entradas.pop(modelo, None)
+
+    def _vigente(self, modelo) -> Optional[_Entrada]:
+        entrada = self._entradas.get(modelo)
+        if entrada and entrada.version == self._versiones.get(modelo, 0) and time.monotonic() - entrada.cargado < self._ttl:
+            return entrada
+        return None
+
+    def _guardar(self, modelo, version: int, filas: list) -> _Entrada:
+        # Copias desacopladas de la sesión que hizo la consulta
+        copias = sorted((modelo(**fila.model_dump()) for fila in filas), key=_clave)
+        contenido = json.dumps([fila.model_dump(mode="json") for fila in copias], sort_keys=True)
+        entrada = _Entrada(version, copias, f'"{hashlib.sha1(contenido.encode()).hexdigest()}"')
+        with self._lock:
+            # Si se invalidó mientras se consultaba, la entrada se usa pero no se guarda
+            if self._versiones.get(modelo, 0) == version:
+                self._entradas[modelo] = entrada
+        return entrada
+
+    def _entrada(self, session, modelo) -> _Entrada:
+        entrada = self._vigente(modelo)
+        if entrada:
+            return entrada
+        version = self._versiones.get(modelo, 0)
+        return self._guardar(modelo, version, session.exec(select(modelo)).all())
+
+    async def _entrada_async(self, session, modelo) -> _Entrada:
+        entrada = self._vigente(modelo)
+        if entrada:
+            return entrada
+        version = self._versiones.get(modelo, 0)
+        return self._guardar(modelo, version, (await session.exec(select(modelo))).all())
+
+    def listar(self, session, modelo) -> list:
+        return self._entrada(session, modelo).filas
+
+    def indice(self, session, modelo) -> dict:
+        return self._entrada(session, modelo).indice
+
+    def etag(self, session, modelo) -> str:
+        return self._entrada(session, modelo).etag
+
+    def obtener(self, session, modelo, fila_id: Optional[int]):
+        if fila_id is None:
+            return None
+        fila = self.indice(session, modelo).get(fila_id)
+        if fila is None:
+            # Puede haberse creado desde otro worker: se recarga una vez
+            self.invalidar(modelo)
+            fila = self.indice(session, modelo).get(fila_id)
+        return fila
+
+    async def obtener_async(self, session, modelo, fila_id: Optional[int]):
+        if fila_id is None:
+            return None
+        fila = (await self._entrada_async(session, modelo)).indice.get(fila_id)
+        if fila is None:
+            self.invalidar(modelo)
+            fila = (await self._entrada_async(session, modelo)).indice.get(fila_id)
+        return fila
+
+    async def calentar(self, session, modelos):
+        for modelo in modelos:
+            await self._entrada_async(session, modelo)
+
+
+cache_referencias = CacheReferencias(CACHE_REFERENCIAS_TTL)
+
+
+def respuesta_condicional(request: Request, response: Response, etag: str) -> Optional[Response]:
+    """Agrega ETag/Cache-Control y retorna un 304 si el cliente ya tiene esta versión."""
+    response.headers["ETag"] = etag
+    response.headers["Cache-Control"] = f"public, max-age={CACHE_REFERENCIAS_MAX_AGE}"
+    if coincide_etag(request, etag):
+        return Response(status_code=304, headers=dict(response.headers))
+    return None
+
+
+def coincide_etag(request: Request, etag: str) -> bool:
+    # If-None-Match usa comparación débil: se ignora el prefijo W/
+    solicitados = [valor.strip().removeprefix("W/") for valor in request.headers.get("if-none-match", "").split(",")]
+    return etag in solicitados or "*" in solicitados
@@ -0,0 +1,36 @@
+# app/core/procesos_core.py
+import os
+import asyncio
+import functools
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from typing import Optional
+
+# Procesos para trabajo de CPU (decodificar y redimensionar imágenes) fuera del event loop
+IMAGENES_PROCESOS = int(os.getenv("IMAGENES_PROCESOS", "2"))
+# Imágenes en proceso a la vez por worker de uvicorn; el resto espera su turno
+IMAGENES_CONCURRENCIA = int(os.getenv("IMAGENES_CONCURRENCIA", str(IMAGENES_PROCESOS)))
+
+_pool: Optional[ProcessPoolExecutor] = None
+_semaforo = asyncio.Semaphore(IMAGENES_CONCURRENCIA)
+
+
+def pool_imagenes() -> ProcessPoolExecutor:
+    global _pool
+    if _pool is None:
+        # forkserver: no hereda los hilos ni las conexiones abiertas del proceso de la API
+        _pool = ProcessPoolExecutor(IMAGENES_PROCESOS, mp_context=multiprocessing.get_context("forkserver"))
+    return _pool
+
+
+async def ejecutar_en_proceso(funcion, *args, **kwargs):
+    async with _semaforo:
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(pool_imagenes(), functools.partial(funcion, *args, **kwargs))
+
+
+def cerrar_pool():
+    global _pool
+    if _pool is not None:
+        _pool.shutdown(wait=True, cancel_futures=True)
+        _pool = None
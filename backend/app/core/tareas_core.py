@@ -0,0 +1,43 @@
+# app/core/tareas_core.py
+import asyncio
+from typing import Awaitable, Callable, Optional
+
+
+class TareaPeriodica:
+    """
+    Ejecuta una corrutina cada `intervalo` segundos dentro del event loop de la app.
+    Al detenerse corre una última vez, para no perder lo que quedó pendiente.
+    """
+
+    def __init__(self, nombre: str, funcion: Callable[[], Awaitable], intervalo: float):
+        self.nombre = nombre
+        self._funcion = funcion
+        self._intervalo = intervalo
+        self._tarea: Optional[asyncio.Task] = None
+        self._detener = asyncio.Event()
+
+    def iniciar(self):
+        self._detener.clear()
+        self._tarea = asyncio.create_task(self._bucle(), name=self.nombre)
+
+    async def _bucle(self):
+        while not self._detener.is_set():
+            try:
+                await asyncio.wait_for(self._detener.wait(), self._intervalo)
+            except asyncio.TimeoutError:
+                await self._ejecutar()
+
+    async def _ejecutar(self):
+        try:
+            await self._funcion()
+        except Exception as e:
+            # Un fallo puntual (p. ej. base de datos caída) no debe terminar la tarea
+            print(f"Error en la tarea periódica {self.nombre}: {e}")
+
+    async def detener(self):
+        if self._tarea is None:
+            return
+        self._detener.set()
+        await self._tarea
+        self._tarea = None
+        await self._ejecutar()
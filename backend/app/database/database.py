@@ -1,12 +1,162 @@
 import os
+import time
+import asyncio
+import threading
 from sqlmodel import create_engine, Session
+from sqlmodel.ext.asyncio.session import AsyncSession
+from anyio import to_thread
+from sqlalchemy import text
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import create_async_engine
+from sqlalchemy.pool import QueuePool, AsyncAdaptedQueuePool
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
 from dotenv import load_dotenv
 
 load_dotenv()
 
 DATABASE_URL = os.getenv("DATABASE_URL")
+# Mismo servidor con el driver asyncpg; se puede fijar explícitamente si la URL usa parámetros de psycopg2
+ASYNC_DATABASE_URL = os.getenv("ASYNC_DATABASE_URL") or make_url(DATABASE_URL).set(drivername="postgresql+asyncpg")
+
+# Configuración del pool (dimensionar según workers de uvicorn x pool_size + max_overflow)
+DB_ECHO = os.getenv("DB_ECHO", "false").lower() == "true"
+DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", "5"))
+DB_MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW", "10"))
+DB_POOL_TIMEOUT = int(os.getenv("DB_POOL_TIMEOUT", "30"))
+DB_POOL_RECYCLE = int(os.getenv("DB_POOL_RECYCLE", "1800"))
+DB_POOL_PRE_PING = os.getenv("DB_POOL_PRE_PING", "true").lower() == "true"
+DB_STATEMENT_TIMEOUT_MS = int(os.getenv("DB_STATEMENT_TIMEOUT_MS", "30000"))
+# Conexiones que se abren al arrancar en cada pool, para que las primeras peticiones no esperen el handshake
+DB_POOL_CALENTAR = int(os.getenv("DB_POOL_CALENTAR", "2"))
+
+
+class MetricasPool:
+    """Contadores de checkout del pool y del tiempo de espera por una conexión libre."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.checkouts = 0
+        self.timeouts = 0
+        self.espera_total = 0.0
+        self.espera_maxima = 0.0
+
+    def registrar(self, espera: float, timeout: bool = False):
+        with self._lock:
+            if timeout:
+                self.timeouts += 1
+            else:
+                self.checkouts += 1
+            self.espera_total += espera
+            self.espera_maxima = max(self.espera_maxima, espera)
+
+    def resumen(self, pool) -> dict:
+        with self._lock:
+            return {
+                "pool_size": pool.size(),
+                "en_uso": pool.checkedout(),
+                "disponibles": pool.checkedin(),
+                "overflow": pool.overflow(),
+                "checkouts": self.checkouts,
+                "timeouts": self.timeouts,
+                "espera_promedio_ms": round(1000 * self.espera_total / max(self.checkouts + self.timeouts, 1), 3),
+                "espera_maxima_ms": round(1000 * self.espera_maxima, 3),
+            }
+
+
+metricas_pool = MetricasPool()
+metricas_pool_async = MetricasPool()
+
+
+class _MedicionCheckout:
+    """Mide cuánto espera cada checkout del pool."""
+
+    metricas: MetricasPool
+
+    def _do_get(self):
+        inicio = time.perf_counter()
+        try:
+            conexion = super()._do_get()
+        except PoolTimeoutError:
+            self.metricas.registrar(time.perf_counter() - inicio, timeout=True)
+            raise
+        self.metricas.registrar(time.perf_counter() - inicio)
+        return conexion
+
+
+class PoolMedido(_MedicionCheckout, QueuePool):
+    metricas = metricas_pool
+
+
+class PoolAsyncMedido(_MedicionCheckout, AsyncAdaptedQueuePool):
+    metricas = metricas_pool_async
+
+
+def _opciones_pool() -> dict:
+    return {
+        "echo": DB_ECHO,
+        "pool_size": DB_POOL_SIZE,
+        "max_overflow": DB_MAX_OVERFLOW,
+        "pool_timeout": DB_POOL_TIMEOUT,
+        "pool_recycle": DB_POOL_RECYCLE,
+        "pool_pre_ping": DB_POOL_PRE_PING,
+    }
+
+
+def crear_engine(url: str = DATABASE_URL):
+    connect_args = {}
+    if DB_STATEMENT_TIMEOUT_MS > 0:
+        connect_args["options"] = f"-c statement_timeout={DB_STATEMENT_TIMEOUT_MS}"
+    return create_engine(url, poolclass=PoolMedido, connect_args=connect_args, **_opciones_pool())
+
+
+def crear_engine_async(url=ASYNC_DATABASE_URL):
+    connect_args = {}
+    if DB_STATEMENT_TIMEOUT_MS > 0:
+        connect_args["server_settings"] = {"statement_timeout": str(DB_STATEMENT_TIMEOUT_MS)}
+    return create_async_engine(url, poolclass=PoolAsyncMedido, connect_args=connect_args, **_opciones_pool())
+
+
+engine = crear_engine()
+async_engine = crear_engine_async()
+
+
+def metricas_db() -> dict:
+    return {
+        "sync": metricas_pool.resumen(engine.pool),
+        "async": metricas_pool_async.resumen(async_engine.sync_engine.pool),
+    }
+
+
+async def _abrir_async():
+    async with async_engine.connect() as conexion:
+        await conexion.execute(text("SELECT 1"))
+
+
+def _abrir_sync(cantidad: int):
+    conexiones = [engine.connect() for _ in range(cantidad)]
+    for conexion in conexiones:
+        conexion.close()
+
+
+async def calentar_pools(cantidad: int = DB_POOL_CALENTAR):
+    # Se abren a la vez para que queden distintas conexiones en el pool, no la misma reutilizada
+    cantidad = min(cantidad, DB_POOL_SIZE)
+    await asyncio.gather(*(_abrir_async() for _ in range(cantidad)))
+    await to_thread.run_sync(_abrir_sync, cantidad)
+
+
+async def verificar_conexion(timeout: float) -> bool:
+    try:
+        await asyncio.wait_for(_abrir_async(), timeout)
+        return True
+    except Exception:
+        return False
+
+
+async def cerrar_pools():
+    await async_engine.dispose()
+    engine.dispose()
 
-engine = create_engine(DATABASE_URL, echo=True)
 
 # Inyección de dependencia a la base de datos
 def get_session():
@@ -14,9 +164,10 @@ def get_session():
         try:
             yield session
         finally:
-            
-            session.close() 
-
 
+            session.close()
 
 
+async def get_async_session():
+    async with AsyncSession(async_engine, expire_on_commit=False) as session:
+        yield session
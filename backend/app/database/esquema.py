@@ -0,0 +1,11 @@
+# app/database/esquema.py
+# Configuración de texto completo: español con stemming e insensible a tildes
+CONFIG_BUSQUEDA = "es_unaccent"
+
+# Documento de búsqueda de un libro: título (A), autor (B), categoría (C), descripción (D)
+DOCUMENTO_BUSQUEDA = f"""
+    setweight(to_tsvector('{CONFIG_BUSQUEDA}', coalesce(libro.lib_titulo, '')), 'A')
+    || setweight(to_tsvector('{CONFIG_BUSQUEDA}', coalesce((SELECT aut_nombre FROM autor WHERE aut_id = libro.lib_idautor), '')), 'B')
+    || setweight(to_tsvector('{CONFIG_BUSQUEDA}', coalesce((SELECT cat_nombre FROM categoria WHERE cat_id = libro.lib_idcategoria), '')), 'C')
+    || setweight(to_tsvector('{CONFIG_BUSQUEDA}', coalesce(libro.lib_descripcion, '')), 'D')
+"""
@@ -1,29 +1,78 @@
 # main.py
 
-from fastapi import FastAPI
-from sqlmodel import SQLModel
+from contextlib import asynccontextmanager
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse
 from fastapi.staticfiles import StaticFiles
-from app.database.database import engine
+from app.database.database import async_engine, calentar_pools, cerrar_pools
+from app.core.cache_core import cache_referencias
+from app.core.procesos_core import cerrar_pool
 from fastapi.middleware.cors import CORSMiddleware
+from app.services.servicio_libro import MAX_FILE_SIZE, MAX_PORTADA_SIZE
+from app.services.servicio_progreso import buffer_progreso, PROGRESO_BUFFER_MS
+from app.services.servicio_lectura import (
+    buffer_latidos, cerrar_sesiones_inactivas, crear_particiones, LATIDOS_BUFFER_MS, LECTURA_BARRIDO_SEGUNDOS
+)
+from app.core.tareas_core import TareaPeriodica
+from app.models.libro.modelo_autor import Autor
+from app.models.libro.modelo_categoria import Categoria
+from app.models.libro.modelo_editorial import Editorial
+from sqlmodel.ext.asyncio.session import AsyncSession
 
 
 
-from app.routers import usuario, autenticacion, pago, autor, categoria, editorial, libro, webhook, texto, progreso, lectura, administrador, estadisticas, soporte
+from app.routers import usuario, autenticacion, pago, autor, categoria, editorial, libro, webhook, texto, progreso, lectura, administrador, estadisticas, soporte, trabajo, salud
 
 
-app = FastAPI(
-    title="Sistema Mixera",
-)
+async def calentar():
+    # El esquema lo aplica `alembic upgrade head` antes de arrancar; aquí se precargan conexiones y cachés
+    try:
+        await calentar_pools()
+        async with AsyncSession(async_engine, expire_on_commit=False) as session:
+            await cache_referencias.calentar(session, [Autor, Categoria, Editorial])
+    except Exception as e:
+        # Sin base la app arranca igual; /health/ready informa hasta que responda
+        print(f"No se pudo precalentar la base de datos: {e}")
+        return
+    # La tarea diaria recién corre tras 24 h: un proceso que se reinicia antes no debe
+    # quedarse sin particiones para los meses siguientes
+    try:
+        await crear_particiones()
+    except Exception as e:
+        print(f"No se pudieron crear las particiones de lectura: {e}")
+
 
-def crear_tablas():
-    SQLModel.metadata.create_all(engine)
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    await calentar()
+    tareas = []
+    if PROGRESO_BUFFER_MS > 0:
+        tareas.append(TareaPeriodica("progreso", buffer_progreso.vaciar, PROGRESO_BUFFER_MS / 1000))
+    if LATIDOS_BUFFER_MS > 0:
+        tareas.append(TareaPeriodica("latidos", buffer_latidos.vaciar, LATIDOS_BUFFER_MS / 1000))
+    if LECTURA_BARRIDO_SEGUNDOS > 0:
+        tareas.append(TareaPeriodica("sesiones_inactivas", cerrar_sesiones_inactivas, LECTURA_BARRIDO_SEGUNDOS))
+    # La migración deja particiones para los próximos meses; esta tarea mantiene la ventana
+    tareas.append(TareaPeriodica("particiones", crear_particiones, 24 * 60 * 60))
+    for tarea in tareas:
+        tarea.iniciar()
+    yield
+    # Al apagar se vacían los buffers pendientes
+    for tarea in tareas:
+        await tarea.detener()
+    cerrar_pool()
+    await cerrar_pools()
 
-crear_tablas()
 
-app.mount("/uploads", StaticFiles(directory="uploads"), name="uploads")
+app = FastAPI(
+    title="Sistema Mixera",
+    lifespan=lifespan,
+)
 
-app.mount("/uploads/books", StaticFiles(directory="uploads/books"), name="books")
+# Solo lo público: los PDF (uploads/books) se descargan por /libros/{id}/pdf, que verifica la compra
 app.mount("/uploads/covers", StaticFiles(directory="uploads/covers"), name="covers")
+# La carpeta se crea con la primera imagen de perfil
+app.mount("/uploads/profile-images", StaticFiles(directory="uploads/profile-images", check_dir=False), name="profile-images")
 
 
 origins = [
@@ -34,6 +83,19 @@ origins = [
 ]
 
 
+# Cuerpo más grande aceptado: PDF + portada + campos del formulario
+MAX_CUERPO_PETICION = MAX_FILE_SIZE + MAX_PORTADA_SIZE + 1024 * 1024
+
+
+@app.middleware("http")
+async def limitar_tamano_peticion(request: Request, call_next):
+    # Se rechaza por Content-Length antes de que Starlette lea y parsee el multipart
+    longitud = request.headers.get("content-length")
+    if longitud and longitud.isdigit() and int(longitud) > MAX_CUERPO_PETICION:
+        return JSONResponse(status_code=413, content={"detail": "La petición excede el tamaño máximo permitido."})
+    return await call_next(request)
+
+
 app.add_middleware(
     CORSMiddleware,
     allow_origins=origins, 
@@ -56,3 +118,5 @@ app.include_router(libro.router)
 app.include_router(texto.router)
 app.include_router(progreso.router)
 app.include_router(lectura.router)
+app.include_router(trabajo.router)
+app.include_router(salud.router)
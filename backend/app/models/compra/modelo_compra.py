@@ -1,8 +1,15 @@
 from sqlmodel import SQLModel, Field
+from sqlalchemy import Index, text
 from typing import Optional
 from datetime import datetime
 
 class Compra(SQLModel, table=True):
+    __table_args__ = (
+        # Verificación de propiedad y biblioteca del usuario
+        Index("ix_compra_usuario_libro_estado", "com_idusuario", "com_idlibro", "com_estado"),
+        # Ventas del día y del mes en el panel de administración
+        Index("ix_compra_aprobada_fecha", "com_fecha", postgresql_where=text("com_estado = 'approved'")),
+    )
     com_id: Optional[int] = Field(default=None, primary_key=True)
     com_idusuario: Optional[int] = Field(default=None, foreign_key="usuario.usu_id")
     com_idlibro: Optional[int] = Field(default=None, foreign_key="libro.lib_id")
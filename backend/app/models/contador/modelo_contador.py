@@ -0,0 +1,18 @@
+from sqlmodel import SQLModel, Field
+from sqlalchemy import BigInteger, SmallInteger, Column
+
+# Contadores que mantienen triggers de la base (migración 0005)
+CONTADOR_USUARIOS = "usuarios"
+CONTADOR_USUARIOS_VERIFICADOS = "usuarios_verificados"
+CONTADOR_LIBROS = "libros"
+# Sesiones de lectura iniciadas; no se descuentan al archivar. Repartido en varios fragmentos
+# (migración 0006) para que los inicios de sesión concurrentes no esperen una misma fila
+CONTADOR_SESIONES_LECTURA = "lectura_sesiones"
+
+
+class Contador(SQLModel, table=True):
+    __tablename__ = "contador"
+    con_nombre: str = Field(max_length=50, primary_key=True)
+    # El valor de un contador es la suma de sus fragmentos
+    con_fragmento: int = Field(default=0, sa_column=Column(SmallInteger, primary_key=True, server_default="0"))
+    con_valor: int = Field(default=0, sa_column=Column(BigInteger, nullable=False, server_default="0"))
@@ -1,14 +1,29 @@
 from sqlmodel import SQLModel, Field
+from sqlalchemy import Index, text
 from typing import Optional
 from datetime import datetime
 
 class LecturaSesion(SQLModel, table=True):
     __tablename__ = "lectura_sesion"
-    ls_id: Optional[int] = Field(default=None, primary_key=True)
+    # Particionada por mes de inicio (lectura_sesion_AAAA_MM); las particiones viejas se
+    # archivan con app/comandos/archivar_lecturas.py
+    __table_args__ = (
+        # Historial y tiempo de lectura por usuario y libro
+        Index("ix_lectura_usuario_libro_final", "ls_idusuario", "ls_idlibro", "ls_fecha_final"),
+        # Sesión abierta al iniciar o finalizar
+        Index("ix_lectura_abierta", "ls_idusuario", "ls_idlibro", postgresql_where=text("ls_fecha_final IS NULL")),
+        # Barrido de sesiones abiertas sin actividad reciente
+        Index("ix_lectura_abierta_actividad", "ls_ultima_actividad", postgresql_where=text("ls_fecha_final IS NULL")),
+        {"postgresql_partition_by": "RANGE (ls_fecha_inicial)"},
+    )
+    ls_id: Optional[int] = Field(default=None, primary_key=True, sa_column_kwargs={"autoincrement": True})
     ls_idusuario: int = Field(foreign_key="usuario.usu_id")
     ls_idlibro: int = Field(foreign_key="libro.lib_id")
-    ls_fecha_inicial: datetime
+    # Parte de la clave primaria porque es la columna de partición
+    ls_fecha_inicial: datetime = Field(primary_key=True)
     ls_fecha_final: Optional[datetime] = None
+    # Último latido del lector; al quedar inactiva, la sesión se cierra en este momento
+    ls_ultima_actividad: Optional[datetime] = None
 
     
     # usuarios: Optional["Usuario"] = Relationship(back_populates="sesion")  # Relación con Usuario
@@ -16,6 +31,43 @@ class LecturaSesion(SQLModel, table=True):
 
     
     
+class LecturaResumenBase(SQLModel):
+    lr_idusuario: int = Field(foreign_key="usuario.usu_id", primary_key=True)
+    lr_idlibro: int = Field(foreign_key="libro.lib_id", primary_key=True)
+    lr_sesiones: int = Field(default=0)
+    lr_segundos: float = Field(default=0)
+    # Suma de los minutos enteros de cada sesión (lo que muestran los reportes)
+    lr_minutos: int = Field(default=0)
+    # Suma de los días enteros entre el inicio de cada sesión y el de la anterior
+    lr_suma_dias: int = Field(default=0)
+    lr_primera_sesion: Optional[datetime] = None
+    lr_ultima_sesion: Optional[datetime] = None
+    lr_ultimo_final: Optional[datetime] = None
+
+
+class LecturaResumen(LecturaResumenBase, table=True):
+    """Acumulado de las sesiones finalizadas de un usuario en un libro; lo actualiza finalizar_sesion."""
+    __tablename__ = "lectura_resumen"
+
+
+class LecturaResumenArchivado(LecturaResumenBase, table=True):
+    """Acumulado de las sesiones ya archivadas, para reconstruir lectura_resumen sin ellas."""
+    __tablename__ = "lectura_resumen_archivado"
+
+
+class LecturaArchivo(SQLModel, table=True):
+    """Partición de lectura_sesion exportada y borrada por archivar_lecturas."""
+    __tablename__ = "lectura_archivo"
+    la_id: Optional[int] = Field(default=None, primary_key=True)
+    la_particion: str = Field(max_length=63, unique=True)
+    la_desde: datetime
+    la_hasta: datetime
+    la_filas: int
+    # CSV comprimido con gzip, relativo a LECTURA_ARCHIVO_DIR
+    la_archivo: str = Field(max_length=255)
+    la_fecha: datetime
+
+
 class LecturaSesionCreate(SQLModel):
 
     ls_idlibro: int
@@ -33,5 +85,6 @@ class LecturaSesionResponse(SQLModel):
     ls_idlibro: int
     ls_fecha_inicial: datetime
     ls_fecha_final: Optional[datetime] = None
+    ls_ultima_actividad: Optional[datetime] = None
 
 
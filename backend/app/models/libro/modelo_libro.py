@@ -1,6 +1,8 @@
 
 
-from sqlmodel import SQLModel, Field
+from sqlmodel import SQLModel, Field, Column
+from sqlalchemy import Integer
+from sqlalchemy.dialects.postgresql import ARRAY
 from typing import Optional
 from datetime import date
 
@@ -20,6 +22,9 @@ class Libro(SQLModel, table=True):
     lib_idautor: Optional[int] = Field(default=None, foreign_key="autor.aut_id")
     lib_idcategoria: Optional[int] = Field(default=None, foreign_key="categoria.cat_id")
     lib_descuento: Optional[int] = Field(default=0)
+    lib_total_paginas: Optional[int] = Field(default=None)
+    # Anchos con variantes generadas (ver app/utils/imagen_utils.py)
+    lib_portada_anchos: Optional[list[int]] = Field(default=None, sa_column=Column(ARRAY(Integer)))
 
     # editorial: Optional["Editorial"] = Relationship(back_populates="libro") # type: ignore
     # categoria: Optional["Categoria"] = Relationship(back_populates="libro") # type: ignore
@@ -77,6 +82,8 @@ class LibroResponse(SQLModel):
     lib_estado: bool
     lib_portada: Optional[str] = None
     lib_descuento: Optional[int] = 0
+    lib_total_paginas: Optional[int] = None
+    lib_portada_anchos: Optional[list[int]] = None
 
     model_config = {"from_attributes": True}
 
@@ -1,9 +1,12 @@
 from sqlmodel import SQLModel, Field
+from sqlalchemy import Index
 from typing import Optional
 
 
 class ProgresoLectura(SQLModel, table=True):
     __tablename__ = "progreso_lectura"
+    # Un progreso por usuario y libro: lo usa el upsert del buffer de progreso
+    __table_args__ = (Index("uq_progreso_usuario_libro", "pro_idusuario", "pro_idlibro", unique=True),)
     pro_id: Optional[int] = Field(default=None, primary_key=True)
     pro_idusuario: Optional[int] = Field(default=None, foreign_key="usuario.usu_id")
     pro_idlibro: Optional[int] = Field(default=None, foreign_key="libro.lib_id")
@@ -30,7 +33,8 @@ class ProgresoLecturaUpdate(SQLModel):
 
 
 class ProgresoLecturaResponse(SQLModel):
-    pro_id: int
+    # Sin id mientras el progreso solo está en el buffer
+    pro_id: Optional[int] = None
     pro_idusuario: Optional[int]
     pro_idlibro: Optional[int]
     pro_pagina_actual: Optional[int]
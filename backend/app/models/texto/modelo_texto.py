@@ -1,5 +1,6 @@
-from typing import Optional
+from typing import Dict, List, Optional
 from datetime import datetime
+from pydantic import model_validator
 from sqlmodel import SQLModel, Field
 
 class Texto(SQLModel, table=True):
@@ -69,4 +70,52 @@ class TextoSimpleResponse(SQLModel):
     txt_texto: str
     
 
-    model_config = {"from_attributes": True}
\ No newline at end of file
+    model_config = {"from_attributes": True}
+
+
+class SinNulos:
+    """Las columnas de texto no admiten NULL: un campo enviado como null se rechaza (422) en vez de fallar el lote."""
+
+    @model_validator(mode="after")
+    def _sin_nulos(self):
+        # txt_id/temp_id en null solo indican cuál de las dos referencias se usa
+        nulos = sorted(
+            campo for campo in self.model_fields_set - {"txt_id", "temp_id"} if getattr(self, campo) is None
+        )
+        if nulos:
+            raise ValueError(f"Campos sin valor: {', '.join(nulos)}")
+        return self
+
+
+class TextoSyncCrear(SinNulos, TextoCreate):
+    # Id provisorio del cliente; la respuesta lo asocia con el txt_id definitivo
+    temp_id: str
+
+
+class TextoSyncActualizar(SinNulos, TextoUpdate):
+    # Un texto guardado (txt_id) o uno creado en este mismo lote (temp_id)
+    txt_id: Optional[int] = None
+    temp_id: Optional[str] = None
+
+
+class TextoSyncEliminar(SQLModel):
+    txt_id: Optional[int] = None
+    temp_id: Optional[str] = None
+
+
+class TextoSyncRequest(SQLModel):
+    """
+    Se aplica en este orden, sin importar el orden en que el cliente hizo los cambios:
+    altas, después modificaciones (las de un mismo texto se combinan en orden, la última gana
+    por campo) y al final bajas. Una baja siempre prevalece sobre cualquier modificación del
+    mismo texto en el lote; para recrearlo, enviar un alta nueva.
+    """
+    crear: List[TextoSyncCrear] = []
+    actualizar: List[TextoSyncActualizar] = []
+    eliminar: List[TextoSyncEliminar] = []
+
+
+class TextoSyncResponse(SQLModel):
+    ids: Dict[str, int]
+    textos: List[TextoResponse]
+    eliminados: List[int]
@@ -0,0 +1,38 @@
+from sqlmodel import SQLModel, Field, Column
+from sqlalchemy import Index
+from sqlalchemy.dialects.postgresql import JSONB
+from typing import Optional
+from datetime import datetime
+
+
+class Trabajo(SQLModel, table=True):
+    __tablename__ = "trabajo"
+    # Búsqueda de la cola: pendientes (o con lease vencido) por fecha de disponibilidad
+    __table_args__ = (Index("ix_trabajo_cola", "tra_estado", "tra_disponible"),)
+
+    tra_id: Optional[int] = Field(default=None, primary_key=True)
+    tra_tipo: str = Field(max_length=50)
+    tra_payload: dict = Field(default_factory=dict, sa_column=Column(JSONB, nullable=False))
+    # pendiente | en_proceso | completado | fallido
+    tra_estado: str = Field(default="pendiente", max_length=20)
+    tra_intentos: int = Field(default=0)
+    tra_max_intentos: int = Field(default=5)
+    # Momento desde el que se puede tomar: reintentos con backoff y vencimiento del lease
+    tra_disponible: datetime = Field(default_factory=datetime.utcnow)
+    tra_error: Optional[str] = None
+    tra_creado: datetime = Field(default_factory=datetime.utcnow)
+    tra_actualizado: datetime = Field(default_factory=datetime.utcnow)
+
+
+class TrabajoResponse(SQLModel):
+    tra_id: int
+    tra_tipo: str
+    tra_estado: str
+    tra_intentos: int
+    tra_max_intentos: int
+    tra_disponible: datetime
+    tra_error: Optional[str] = None
+    tra_creado: datetime
+    tra_actualizado: datetime
+
+    model_config = {"from_attributes": True}
@@ -1,7 +1,7 @@
 from fastapi import APIRouter, Depends, HTTPException, Query
 from sqlalchemy.orm import Session
 from typing import List
-from app.database.database import get_session
+from app.database.database import get_session, metricas_db
 from app.services.servicio_administrador import AdministradorServicio
 
 
@@ -18,6 +18,10 @@ def dashboard(session: Session = Depends(get_session)):
     servicio = AdministradorServicio(session)
     return servicio.listar_dashboard()
 
+@router.get("/metricas/pool")
+def metricas_pool():
+    return metricas_db()
+
 @router.get("/usuarios")
 def obtener_usuarios(session: Session = Depends(get_session),
     busqueda: str = Query(None, description="Buscar por nombre, email o usuario"),
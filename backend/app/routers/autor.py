@@ -1,16 +1,20 @@
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, Request, Response, HTTPException
 from sqlmodel import Session
 from typing import List
 
 from app.models.libro.modelo_autor import Autor, AutorCreate, AutorUpdate
 from app.database.database import get_session
 from app.services.servicio_autor import AutorServicio
+from app.core.cache_core import cache_referencias, respuesta_condicional
 
 router = APIRouter(prefix="/autores", tags=["Autores"])
 
 
 @router.get("/", response_model=List[Autor])
-def listar_autores(session: Session = Depends(get_session)):
+def listar_autores(request: Request, response: Response, session: Session = Depends(get_session)):
+    no_modificado = respuesta_condicional(request, response, cache_referencias.etag(session, Autor))
+    if no_modificado:
+        return no_modificado
     return AutorServicio(session).listar_autores()
 
 @router.post("/", response_model=Autor, status_code=201)
@@ -1,15 +1,19 @@
-from fastapi import APIRouter, Depends
+from fastapi import APIRouter, Depends, Request, Response
 from sqlmodel import Session
 from typing import List
 
 from app.database.database import get_session
 from app.models.libro.modelo_categoria import Categoria, CategoriaCreate, CategoriaUpdate
 from app.services.servicio_categoria import CategoriaServicio
+from app.core.cache_core import cache_referencias, respuesta_condicional
 
 router = APIRouter(prefix="/categorias", tags=["Categorías"])
 
 @router.get("/", response_model=List[Categoria])
-def listar_categorias(session: Session = Depends(get_session)):
+def listar_categorias(request: Request, response: Response, session: Session = Depends(get_session)):
+    no_modificado = respuesta_condicional(request, response, cache_referencias.etag(session, Categoria))
+    if no_modificado:
+        return no_modificado
     return CategoriaServicio(session).listar_categorias()
 
 @router.post("/", response_model=Categoria, status_code=201)
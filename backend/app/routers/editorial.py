@@ -1,15 +1,19 @@
-from fastapi import APIRouter, Depends
+from fastapi import APIRouter, Depends, Request, Response
 from sqlmodel import Session
 from typing import List
 from app.database.database import get_session
 from app.models.libro.modelo_editorial import Editorial, EditorialCreate, EditorialUpdate
 from app.services.servicio_editorial import EditorialServicio
+from app.core.cache_core import cache_referencias, respuesta_condicional
 
 router = APIRouter(prefix="/editoriales", tags=["Editoriales"])
 
 
 @router.get("/", response_model=List[Editorial])
-def listar_editoriales(session: Session = Depends(get_session)):
+def listar_editoriales(request: Request, response: Response, session: Session = Depends(get_session)):
+    no_modificado = respuesta_condicional(request, response, cache_referencias.etag(session, Editorial))
+    if no_modificado:
+        return no_modificado
     return EditorialServicio(session).listar_editoriales()
 
 @router.post("/", response_model=Editorial, status_code=201)
@@ -1,16 +1,25 @@
 # routers/libro_router.py
-from fastapi import APIRouter, UploadFile, File, Depends, Form, Request, HTTPException
-from sqlalchemy.orm import Session
+import os
+from anyio import to_thread
+from fastapi import APIRouter, UploadFile, File, Depends, Form, Request, HTTPException, Query, Response
+from fastapi.responses import FileResponse
+from sqlmodel.ext.asyncio.session import AsyncSession
 from app.services.servicio_libro import LibroServicio
 from app.models.libro.modelo_libro import LibroCreate, LibroUpdate
-from app.database.database import get_session
+from app.database.database import get_async_session
 from app.core.auth_core import obtener_usuario
+from app.core.cache_core import coincide_etag
+from app.utils.archivo_utils import etag_archivo
 from datetime import date
 from app.utils.url_ultils import obtener_base_url
 from typing import Optional
 
 router = APIRouter(prefix="/libros", tags=["Libros"])
 
+# /libros/{id}/pdf sirve otro archivo cuando el libro se actualiza o se linealiza: el navegador
+# revalida siempre con el ETag (304 si no cambió). Privado porque requiere sesión
+CACHE_PDF = "private, no-cache"
+
 class LibroCreateForm:
     def __init__(
         self,
@@ -57,42 +66,110 @@ class LibroUpdateForm:
 
 
 @router.get("/usuario")
-def obtener_libros_comprados(request: Request, session: Session = Depends(get_session),usuario: dict = Depends(obtener_usuario)
+async def obtener_libros_comprados(request: Request, session: AsyncSession = Depends(get_async_session),usuario: dict = Depends(obtener_usuario)
 ):
     base_url = obtener_base_url(request)
     servicio = LibroServicio(session)
-    return servicio.listar_libros_comprados(usuario["usu_id"], base_url)
+    return await servicio.listar_libros_comprados(usuario["usu_id"], base_url)
+
+
+@router.get("/sugerencias")
+async def obtener_sugerencias(
+    session: AsyncSession = Depends(get_async_session),
+    q: str = Query(..., min_length=2),
+    limite: int = Query(8, ge=1, le=20),
+):
+    return await LibroServicio(session).sugerencias(q, limite)
 
 
 @router.get("/{id}")
-def obtener_libro(id: int, request: Request, session: Session = Depends(get_session), usuario: dict = Depends(obtener_usuario)
+async def obtener_libro(id: int, request: Request, session: AsyncSession = Depends(get_async_session), usuario: dict = Depends(obtener_usuario)
 ):
     base_url = obtener_base_url(request)
-    servicio_libro = LibroServicio(session).listar_libro_id(id, usuario["usu_id"], base_url)
+    servicio_libro = await LibroServicio(session).listar_libro_id(id, usuario["usu_id"], base_url)
     if not servicio_libro:
         raise HTTPException(status_code=404, detail="Libro no encontrado")
     return servicio_libro
 
 
+@router.api_route("/{id}/pdf", methods=["GET", "HEAD"])
+async def descargar_pdf(id: int, request: Request, session: AsyncSession = Depends(get_async_session), usuario: dict = Depends(obtener_usuario)
+):
+    # FileResponse resuelve Range/If-Range y HEAD; el cuerpo se envía por bloques (o pathsend si el servidor lo soporta)
+    libro, ruta = await LibroServicio(session).archivo_pdf(id, usuario["usu_id"])
+    stat = await to_thread.run_sync(os.stat, ruta)
+    headers = {"ETag": etag_archivo(libro.lib_url, stat), "Cache-Control": CACHE_PDF}
+    if coincide_etag(request, headers["ETag"]):
+        return Response(status_code=304, headers=headers)
+    return FileResponse(
+        ruta,
+        stat_result=stat,
+        media_type="application/pdf",
+        headers=headers,
+        filename=f"{libro.lib_titulo or libro.lib_id}.pdf",
+        content_disposition_type="inline",
+    )
+
+
+@router.get("/{id}/pdf/info")
+async def info_pdf(id: int, session: AsyncSession = Depends(get_async_session), usuario: dict = Depends(obtener_usuario)
+):
+    libro, ruta = await LibroServicio(session).archivo_pdf(id, usuario["usu_id"])
+    stat = await to_thread.run_sync(os.stat, ruta)
+    return {
+        "id": libro.lib_id,
+        "titulo": libro.lib_titulo,
+        "tamano": stat.st_size,
+        "etag": etag_archivo(libro.lib_url, stat),
+    }
+
+
 @router.get("/")
-def obtener_libros(request: Request, session: Session = Depends(get_session), q: str = ""):
+async def obtener_libros(
+    request: Request,
+    session: AsyncSession = Depends(get_async_session),
+    q: str = "",
+    idcategoria: Optional[int] = None,
+    idautor: Optional[int] = None,
+    estado: Optional[bool] = None,
+    limite: Optional[int] = Query(None, ge=1, description="Activa la paginación por cursor"),
+    cursor: Optional[str] = Query(None, description="Valor next_cursor de la página anterior"),
+    orden: str = Query("fecha", pattern="^(fecha|precio|titulo|relevancia)$"),
+    direccion: str = Query("desc", pattern="^(asc|desc)$"),
+):
     base_url = obtener_base_url(request)
     servicio = LibroServicio(session)
-    libros = servicio.listar_libros(q=q)
-    return [servicio.serializar_libros(libro, base_url) for libro in libros]
+    if limite is None and cursor is None:
+        libros = await servicio.listar_libros(q=q, idcategoria=idcategoria, idautor=idautor, estado=estado)
+        return await servicio.serializar_lista_libros(libros, base_url)
+
+    libros, next_cursor = await servicio.listar_libros_paginado(
+        q=q,
+        orden=orden,
+        direccion=direccion,
+        limite=limite or 20,
+        cursor=cursor,
+        idcategoria=idcategoria,
+        idautor=idautor,
+        estado=estado,
+    )
+    return {
+        "libros": await servicio.serializar_lista_libros(libros, base_url),
+        "next_cursor": next_cursor,
+    }
 
 
 @router.post("/")
-async def crear_libro(data: LibroCreateForm = Depends(), session: Session = Depends(get_session), file: UploadFile = File(...), portada: UploadFile = File(...)
+async def crear_libro(data: LibroCreateForm = Depends(), session: AsyncSession = Depends(get_async_session), file: UploadFile = File(...), portada: UploadFile = File(...)
 ):
     libro_data = LibroCreate(**data.__dict__)
-    libro = LibroServicio(session).crear_libro(file, portada, libro_data)
-    return libro
+    # El procesamiento del PDF queda encolado; su estado se consulta en /trabajos/{trabajo_id}
+    return await LibroServicio(session).crear_libro(file, portada, libro_data)
 
 
 @router.put("/{id}")
-async def actualizar_libro(id: int, data: LibroUpdateForm = Depends(), session: Session = Depends(get_session), file: Optional[UploadFile] = File(None), portada: Optional[UploadFile] = File(None)
+async def actualizar_libro(id: int, data: LibroUpdateForm = Depends(), session: AsyncSession = Depends(get_async_session), file: Optional[UploadFile] = File(None), portada: Optional[UploadFile] = File(None)
 ):
     libro_data = LibroUpdate(**data.__dict__)
     servicio = LibroServicio(session)
-    return servicio.actualizar_libro(id, libro_data, file, portada)
+    return await servicio.actualizar_libro(id, libro_data, file, portada)
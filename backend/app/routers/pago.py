@@ -4,7 +4,7 @@ from fastapi import APIRouter, Depends, HTTPException
 from sqlalchemy.orm import Session
 from app.services.servicio_pago import crear_preferencia_pago
 from app.core.auth_core import obtener_usuario
-from app.services.servicio_libro import LibroServicio
+from app.models.libro.modelo_libro import Libro
 from app.database.database import get_session
 from app.services.servicio_compra import CompraServicio
 
@@ -14,15 +14,15 @@ router = APIRouter(prefix="/pago", tags=["Pago"])
 @router.get("/{libro}")
 def generar_enlace_pago(libro: int, session: Session = Depends(get_session), usuario: dict = Depends(obtener_usuario)):
     compra_service = CompraServicio(session)
-    libro = LibroServicio(session).listar_libro_id(libro, usuario["usu_id"])
+    libro = session.get(Libro, libro)
     if not libro:
         raise HTTPException(status_code=404, detail="Libro no encontrado")
 
     try:
         link, reference, precio_final = crear_preferencia_pago(
-            libro["titulo"], libro["precio"], libro.get("descuento", 0), usuario["usu_id"], libro["id"]
+            libro.lib_titulo, libro.lib_precio, libro.lib_descuento or 0, usuario["usu_id"], libro.lib_id
         )
-        compra_service.guardar_compra(usuario['usu_id'], libro["id"], reference)
+        compra_service.guardar_compra(usuario['usu_id'], libro.lib_id, reference)
 
         return {"link_pago": link, "precio_final": precio_final}
     
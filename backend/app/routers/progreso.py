@@ -1,8 +1,8 @@
 # app/routes/progreso.py
 from fastapi import APIRouter, Depends
-from sqlalchemy.orm import Session
+from sqlmodel.ext.asyncio.session import AsyncSession
 from app.services.servicio_progreso import ProgresoLecturaServicio
-from app.database.database import get_session
+from app.database.database import get_async_session
 from app.models.libro.progreso.modelo_progreso import ProgresoLecturaCreate, ProgresoLecturaResponse
 from app.core.auth_core import obtener_usuario  # Tu dependencia de usuario
 
@@ -11,23 +11,23 @@ router = APIRouter(prefix="/progresos", tags=["Progresos"])
 
 
 @router.get("/usuario/{id}", response_model=ProgresoLecturaResponse)
-def obtener_progreso_libro_usuario(
+async def obtener_progreso_libro_usuario(
     id: int,
-    session: Session = Depends(get_session),
+    session: AsyncSession = Depends(get_async_session),
     usuario: dict = Depends(obtener_usuario)
 ):
     usuario_id = usuario["usu_id"]
     servicio = ProgresoLecturaServicio(session)
-    progreso = servicio.obtener_progreso(usuario_id, id)
+    progreso = await servicio.obtener_progreso(usuario_id, id)
     return progreso
 
 @router.post("/usuario", response_model=ProgresoLecturaResponse)
-def guardar_progreso(
+async def guardar_progreso(
     progreso_data: ProgresoLecturaCreate,
-    session: Session = Depends(get_session),
+    session: AsyncSession = Depends(get_async_session),
     usuario: dict = Depends(obtener_usuario)
 ):
 
     servicio = ProgresoLecturaServicio(session)
-    progreso = servicio.guardar_o_actualizar_progreso(usuario["usu_id"], progreso_data)
+    progreso = await servicio.guardar_o_actualizar_progreso(usuario["usu_id"], progreso_data)
     return progreso
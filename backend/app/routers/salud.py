@@ -0,0 +1,23 @@
+# app/routers/salud.py
+import os
+from fastapi import APIRouter
+from fastapi.responses import JSONResponse
+from app.database.database import verificar_conexion
+
+# Tiempo máximo de la consulta de readiness, por debajo del timeout del orquestador
+SALUD_TIMEOUT = float(os.getenv("SALUD_TIMEOUT", "2"))
+
+router = APIRouter(prefix="/health", tags=["Salud"])
+
+
+@router.get("/live")
+async def vivo():
+    # Solo confirma que el proceso atiende; no toca la base para no reiniciar workers por una caída de Postgres
+    return {"estado": "ok"}
+
+
+@router.get("/ready")
+async def listo():
+    if not await verificar_conexion(SALUD_TIMEOUT):
+        return JSONResponse(status_code=503, content={"estado": "sin base de datos"})
+    return {"estado": "ok"}
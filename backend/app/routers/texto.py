@@ -1,48 +1,59 @@
 from fastapi import APIRouter, Depends, HTTPException
-from sqlmodel import Session
+from sqlmodel.ext.asyncio.session import AsyncSession
 from typing import List
-from app.database.database import get_session
-from app.models.texto.modelo_texto import TextoCreate, TextoUpdate, TextoResponse
+from app.database.database import get_async_session
+from app.models.texto.modelo_texto import TextoCreate, TextoUpdate, TextoResponse, TextoSyncRequest, TextoSyncResponse
 from app.services.servicio_texto import TextoServicio
 from app.core.auth_core import obtener_usuario
 
 router = APIRouter(prefix="/textos", tags=["Textos"])
 
 @router.get("/usuario/{id}", response_model=List[TextoResponse])
-def obtener_textos(id: int, session: Session = Depends(get_session), usuario: dict = Depends(obtener_usuario)):
+async def obtener_textos(id: int, session: AsyncSession = Depends(get_async_session), usuario: dict = Depends(obtener_usuario)):
     servicio = TextoServicio(session)
-    textos = servicio.listar_libro_id_usuario(id, usuario["usu_id"])
+    textos = await servicio.listar_libro_id_usuario(id, usuario["usu_id"])
     return textos
 
 
 @router.post("/", response_model=TextoResponse)
-def crear_texto(
+async def crear_texto(
     texto_in: TextoCreate,
-    session: Session = Depends(get_session),
+    session: AsyncSession = Depends(get_async_session),
     usuario: dict = Depends(obtener_usuario)
 ):
     servicio = TextoServicio(session)
-    texto_creado = servicio.crear_texto(texto_in, usuario["usu_id"])
+    texto_creado = await servicio.crear_texto(texto_in, usuario["usu_id"])
     return texto_creado
 
 
+@router.post("/sync", response_model=TextoSyncResponse)
+async def sincronizar_textos(
+    datos: TextoSyncRequest,
+    session: AsyncSession = Depends(get_async_session),
+    usuario: dict = Depends(obtener_usuario)
+):
+    # Lote de altas, cambios y bajas del lector (incluidos los hechos sin conexión), todo o nada
+    servicio = TextoServicio(session)
+    return await servicio.sincronizar(datos, usuario["usu_id"])
+
+
 @router.put("/{id}", response_model=TextoResponse)
-def actualizar_texto(
+async def actualizar_texto(
     id: int,
     texto_in: TextoUpdate,
-    session: Session = Depends(get_session)
+    session: AsyncSession = Depends(get_async_session)
 ):
     servicio = TextoServicio(session)
-    texto = servicio.actualizar_texto(id, texto_in.dict(exclude_unset=True))
+    texto = await servicio.actualizar_texto(id, texto_in.dict(exclude_unset=True))
     if not texto:
         raise HTTPException(status_code=404, detail="Texto no encontrado")
     return texto
 
 
 @router.delete("/{id}", response_model=dict)
-def eliminar_texto(id: int, session: Session = Depends(get_session)):
+async def eliminar_texto(id: int, session: AsyncSession = Depends(get_async_session)):
     servicio = TextoServicio(session)
-    exito = servicio.eliminar_texto(id)
+    exito = await servicio.eliminar_texto(id)
     if not exito:
         raise HTTPException(status_code=404, detail="Texto no encontrado")
     return {"ok": True}
@@ -0,0 +1,17 @@
+from fastapi import APIRouter, Depends, HTTPException
+from sqlmodel.ext.asyncio.session import AsyncSession
+from app.database.database import get_async_session
+from app.models.trabajo.modelo_trabajo import TrabajoResponse
+from app.services.servicio_trabajo import TrabajoServicio
+from app.core.auth_core import verificar_rol
+
+router = APIRouter(prefix="/trabajos", tags=["Trabajos"])
+
+
+# Los trabajos los encola la administración de libros; su payload y errores no son para los lectores
+@router.get("/{id}", response_model=TrabajoResponse)
+async def obtener_trabajo(id: int, session: AsyncSession = Depends(get_async_session), usuario: dict = Depends(verificar_rol(["ADMINISTRADOR"]))):
+    trabajo = await TrabajoServicio(session).obtener(id)
+    if not trabajo:
+        raise HTTPException(status_code=404, detail="Trabajo no encontrado")
+    return trabajo
@@ -54,6 +54,8 @@ def obtener_perfil(session: Session = Depends(get_session), usuario: dict = Depe
 async def cargar_imagen(file: UploadFile = File(...), usuario = Depends(obtener_usuario), session: Session = Depends(get_session)):
     try:
         return await servicio_usuario.subir_imagen_perfil(file, usuario["usu_id"], session)
+    except HTTPException:
+        raise
     except ValueError as e:
         raise HTTPException(status_code=400, detail=str(e))
     except Exception:
@@ -2,7 +2,7 @@
 from fastapi import APIRouter, Request, Depends
 from app.services.servicio_compra import CompraServicio
 from app.database.database import get_session
-from app.services.servicio_pago import sdk
+from app.services.servicio_pago import sdk_mercadopago
 from sqlalchemy.orm import Session
 
 router = APIRouter(prefix="/webhook", tags=["webhook"])
@@ -22,7 +22,7 @@ async def webhook_mercadopago(request: Request, session: Session = Depends(get_s
         return {"status": "ignored", "reason": "no payment id"}
 
     # Consultar pago real con SDK
-    payment_info = sdk.payment().get(payment_id)
+    payment_info = sdk_mercadopago().payment().get(payment_id)
     response = payment_info.get("response", {})
     status_mp = response.get("status")  # "approved", "pending", etc.
     external_reference = response.get("external_reference")
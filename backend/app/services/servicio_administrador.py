@@ -3,7 +3,11 @@ from sqlalchemy.orm import Session
 from app.models.usuario.modelo_usuario import Usuario
 from app.models.libro.progreso.modelo_progreso import ProgresoLectura
 from app.models.texto.modelo_texto import Texto
-from app.models.libro.lectura.modelo_lectura import LecturaSesion
+from app.models.libro.lectura.modelo_lectura import LecturaResumen
+from app.models.contador.modelo_contador import (
+    Contador, CONTADOR_USUARIOS, CONTADOR_USUARIOS_VERIFICADOS, CONTADOR_LIBROS, CONTADOR_SESIONES_LECTURA
+)
+from app.services.servicio_progreso import progreso_vigente
 from app.models.compra.modelo_compra import Compra
 from app.models.libro.modelo_libro import Libro
 from sqlalchemy import func, or_
@@ -35,9 +39,9 @@ class AdministradorServicio:
                 Usuario.usu_fecharegistro,
                 Usuario.usu_ciudad,
                 Usuario.usu_pais,
-                func.max(LecturaSesion.ls_fecha_final).label("ultima_actividad"),
+                func.max(LecturaResumen.lr_ultimo_final).label("ultima_actividad"),
             )
-            .outerjoin(LecturaSesion, Usuario.usu_id == LecturaSesion.ls_idusuario)
+            .outerjoin(LecturaResumen, Usuario.usu_id == LecturaResumen.lr_idusuario)
             .group_by(Usuario.usu_id)
         )
 
@@ -110,58 +114,41 @@ class AdministradorServicio:
         return usuarios
 
     def listar_actividad_usuario(self, usu_id: int) -> List[dict]:
-        progresos = (
-            self.session.query(ProgresoLectura).filter_by(pro_idusuario=usu_id).all()
+        # Tiempo y última sesión salen de lectura_resumen; las notas, de un conteo agrupado
+        notas = (
+            self.session.query(Texto.txt_idlibro, func.count().label("total"))
+            .filter(Texto.txt_idusuario == usu_id)
+            .group_by(Texto.txt_idlibro)
+            .subquery()
         )
-
-        libros_con_progreso = []
-
-        for prog in progresos:
-            # Obtener sesiones de lectura del usuario para ese libro
-            sesiones = (
-                self.session.query(LecturaSesion)
-                .filter_by(ls_idusuario=usu_id, ls_idlibro=prog.pro_idlibro)
-                .all()
-            )
-
-            tiempo_minutos = 0
-            for sesion in sesiones:
-                if sesion.ls_fecha_final:
-                    duracion = sesion.ls_fecha_final - sesion.ls_fecha_inicial
-                    tiempo_minutos += int(duracion.total_seconds() // 60)
-
-            ultima_sesion = (
-                self.session.query(LecturaSesion)
-                .filter_by(ls_idusuario=usu_id, ls_idlibro=prog.pro_idlibro)
-                .filter(LecturaSesion.ls_fecha_final.isnot(None))
-                .order_by(LecturaSesion.ls_fecha_final.desc())
-                .first()
-            )
-
-            total_notas = (
-                self.session.query(Texto)
-                .filter_by(txt_idusuario=usu_id, txt_idlibro=prog.pro_idlibro)
-                .count()
+        filas = (
+            self.session.query(ProgresoLectura, Libro.lib_titulo, LecturaResumen, notas.c.total)
+            .outerjoin(Libro, Libro.lib_id == ProgresoLectura.pro_idlibro)
+            .outerjoin(
+                LecturaResumen,
+                (LecturaResumen.lr_idusuario == ProgresoLectura.pro_idusuario)
+                & (LecturaResumen.lr_idlibro == ProgresoLectura.pro_idlibro),
             )
+            .outerjoin(notas, notas.c.txt_idlibro == ProgresoLectura.pro_idlibro)
+            .filter(ProgresoLectura.pro_idusuario == usu_id)
+            .all()
+        )
 
-            # Obtener título del libro sin relationship
-            libro = (
-                self.session.query(Libro)
-                .filter(Libro.lib_id == prog.pro_idlibro)
-                .first()
-            )
+        libros_con_progreso = []
 
+        for prog, titulo, resumen, total_notas in filas:
+            prog = progreso_vigente(usu_id, prog.pro_idlibro, prog)
             libros_con_progreso.append(
                 {
                     "lib_id": prog.pro_idlibro,
-                    "lib_titulo": libro.lib_titulo if libro else None,
+                    "lib_titulo": titulo,
                     "paginas_leidas": prog.pro_pagina_actual or 0,
                     "paginas_totales": prog.pro_pagina_total or 0,
-                    "notas": total_notas,
-                    "tiempo_minutos": tiempo_minutos,
+                    "notas": total_notas or 0,
+                    "tiempo_minutos": resumen.lr_minutos if resumen else 0,
                     "ultima_sesion": (
-                        ultima_sesion.ls_fecha_final.isoformat()
-                        if ultima_sesion and ultima_sesion.ls_fecha_final
+                        resumen.lr_ultimo_final.isoformat()
+                        if resumen and resumen.lr_ultimo_final
                         else None
                     ),
                 }
@@ -202,13 +189,11 @@ class AdministradorServicio:
         hoy = date.today()
         inicio_mes = date(hoy.year, hoy.month, 1)
 
-        total_usuarios = self.session.query(Usuario).count()
-
-        usuarios_activos = (
-            self.session.query(Usuario).filter(Usuario.usu_verificado.is_(True)).count()
-        )
-
-        total_libros = self.session.query(Libro).count()
+        # Totales mantenidos por triggers, sin recorrer las tablas
+        contadores = {
+            nombre: int(valor)
+            for nombre, valor in self.session.query(Contador.con_nombre, func.sum(Contador.con_valor)).group_by(Contador.con_nombre)
+        }
 
         ventas_hoy = (
             self.session.query(Compra)
@@ -230,14 +215,12 @@ class AdministradorServicio:
             .scalar()
         ) or 0
 
-        descargas = self.session.query(LecturaSesion).count()
-
         return {
-            "totalUsuarios": total_usuarios,
-            "usuariosActivos": usuarios_activos,
-            "totalLibros": total_libros,
+            "totalUsuarios": contadores.get(CONTADOR_USUARIOS, 0),
+            "usuariosActivos": contadores.get(CONTADOR_USUARIOS_VERIFICADOS, 0),
+            "totalLibros": contadores.get(CONTADOR_LIBROS, 0),
             "ventasHoy": ventas_hoy,
             "ventasMes": ventas_mes,
             "ingresosMes": ingresos_mes,
-            "descargas": descargas,
+            "descargas": contadores.get(CONTADOR_SESIONES_LECTURA, 0),
         }
@@ -1,5 +1,7 @@
-from sqlmodel import Session, select
+from sqlmodel import Session
 from app.models.libro.modelo_autor import Autor, AutorCreate, AutorUpdate
+from app.core.cache_core import cache_referencias
+from app.services.servicio_libro import sentencia_indexar_busqueda
 
 
 
@@ -9,7 +11,7 @@ class AutorServicio:
 
     # Listar todos los autores
     def listar_autores(self) -> list[Autor]:
-        return self.session.exec(select(Autor)).all()
+        return cache_referencias.listar(self.session, Autor)
 
     # Crear autor
     def crear_autor(self, data: AutorCreate) -> Autor:
@@ -17,6 +19,7 @@ class AutorServicio:
         self.session.add(autor)
         self.session.commit()
         self.session.refresh(autor)
+        cache_referencias.invalidar(Autor)
         return autor
 
     # Actualizar autor
@@ -28,6 +31,10 @@ class AutorServicio:
             setattr(autor, key, value)
 
         self.session.add(autor)
+        self.session.flush()
+        # El nombre forma parte del documento de búsqueda de sus libros
+        self.session.execute(sentencia_indexar_busqueda("lib_idautor = :id"), {"id": aut_id})
         self.session.commit()
         self.session.refresh(autor)
+        cache_referencias.invalidar(Autor)
         return autor
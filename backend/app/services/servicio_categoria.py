@@ -1,12 +1,14 @@
-from sqlmodel import Session, select
+from sqlmodel import Session
 from app.models.libro.modelo_categoria import Categoria, CategoriaCreate, CategoriaUpdate
+from app.core.cache_core import cache_referencias
+from app.services.servicio_libro import sentencia_indexar_busqueda
 
 class CategoriaServicio:
     def __init__(self, session: Session):
         self.session = session
 
     def listar_categorias(self) -> list[Categoria]:
-        return self.session.exec(select(Categoria)).all()
+        return cache_referencias.listar(self.session, Categoria)
 
 
     def crear_categoria(self, data: CategoriaCreate) -> Categoria:
@@ -14,6 +16,7 @@ class CategoriaServicio:
         self.session.add(categoria)
         self.session.commit()
         self.session.refresh(categoria)
+        cache_referencias.invalidar(Categoria)
         return categoria
 
     def actualizar_categoria(self, categoria_id: int, data: CategoriaUpdate) -> Categoria:
@@ -23,6 +26,10 @@ class CategoriaServicio:
             setattr(categoria, key, value)
 
         self.session.add(categoria)
+        self.session.flush()
+        # El nombre forma parte del documento de búsqueda de sus libros
+        self.session.execute(sentencia_indexar_busqueda("lib_idcategoria = :id"), {"id": categoria_id})
         self.session.commit()
         self.session.refresh(categoria)
+        cache_referencias.invalidar(Categoria)
         return categoria
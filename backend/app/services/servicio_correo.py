@@ -1,6 +1,5 @@
 # app/services/servicio_correo.py
 import os
-import httpx
 import asyncio
 
 BREVO_API_KEY = os.getenv("BREVO_API_KEY")
@@ -31,6 +30,9 @@ def _plantilla_html(enlace: str, titulo: str, boton: str) -> str:
     """
 
 async def enviar_correo(destinatario: str, enlace: str, tipo: str = "activacion") -> None:
+    # httpx se carga con el primer envío, no al importar la app
+    import httpx
+
     if not BREVO_API_KEY:
         raise RuntimeError("Falta BREVO_API_KEY en variables de entorno.")
     if not SENDER_EMAIL:
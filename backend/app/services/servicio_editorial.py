@@ -1,13 +1,14 @@
-from sqlmodel import Session, select
+from sqlmodel import Session
 from fastapi import HTTPException
 from app.models.libro.modelo_editorial import Editorial, EditorialCreate, EditorialUpdate
+from app.core.cache_core import cache_referencias
 
 class EditorialServicio:
     def __init__(self, session: Session):
         self.session = session
 
     def listar_editoriales(self) -> list[Editorial]:
-        return self.session.exec(select(Editorial)).all()
+        return cache_referencias.listar(self.session, Editorial)
 
     def obtener_editorial(self, edit_id: int) -> Editorial:
         editorial = self.session.get(Editorial, edit_id)
@@ -20,6 +21,7 @@ class EditorialServicio:
         self.session.add(editorial)
         self.session.commit()
         self.session.refresh(editorial)
+        cache_referencias.invalidar(Editorial)
         return editorial
 
     def actualizar_editorial(self, edit_id: int, data: EditorialUpdate) -> Editorial:
@@ -32,4 +34,5 @@ class EditorialServicio:
         self.session.add(editorial)
         self.session.commit()
         self.session.refresh(editorial)
+        cache_referencias.invalidar(Editorial)
         return editorial
@@ -1,9 +1,5 @@
-import os
 from datetime import datetime, timezone
-import mercadopago
-
-ACCESS_TOKEN = os.getenv("MP_ACCESS_TOKEN_PROD")
-sdk = mercadopago.SDK(ACCESS_TOKEN)
+from app.services.servicio_pago import sdk_mercadopago
 
 
 def _sum_fee(payment: dict) -> float:
@@ -12,7 +8,7 @@ def _sum_fee(payment: dict) -> float:
 
 
 def listar_estadisticas():
-    result = sdk.payment().search({"status": "approved"})
+    result = sdk_mercadopago().payment().search({"status": "approved"})
     pagos = result.get("response", {}).get("results", [])
 
     hoy = datetime.now(timezone.utc).date()
@@ -1,112 +1,341 @@
-from sqlalchemy.orm import Session
-from sqlalchemy import asc
-from datetime import datetime
-from app.models.libro.lectura.modelo_lectura import LecturaSesion
+import os
+from typing import Optional
+from sqlmodel import select
+from sqlmodel.ext.asyncio.session import AsyncSession
+from sqlalchemy import func, update, values, column, tuple_, text, Integer, DateTime
+from sqlalchemy.dialects.postgresql import insert
+from datetime import date, datetime, timedelta
+from app.database.database import async_engine
+from app.models.libro.lectura.modelo_lectura import LecturaSesion, LecturaResumen
+
+# Minutos sin latidos tras los que una sesión abierta se da por terminada
+LECTURA_INACTIVIDAD_MINUTOS = int(os.getenv("LECTURA_INACTIVIDAD_MINUTOS", "30"))
+# Cada cuántos milisegundos se escriben los latidos acumulados; 0 escribe en cada petición
+LATIDOS_BUFFER_MS = int(os.getenv("LATIDOS_BUFFER_MS", "5000"))
+# Cada cuántos segundos se cierran las sesiones inactivas; 0 desactiva el barrido. Activarlo solo
+# cuando todos los clientes envían latidos (POST /lecturas/latido): sin ellos cerraría en su
+# inicio, con 0 minutos, toda sesión que pase de LECTURA_INACTIVIDAD_MINUTOS
+LECTURA_BARRIDO_SEGUNDOS = int(os.getenv("LECTURA_BARRIDO_SEGUNDOS", "0"))
+# Sesiones que cierra cada transacción del barrido
+LECTURA_BARRIDO_LOTE = 500
+# Particiones mensuales de lectura_sesion que se mantienen creadas por delante del mes actual
+LECTURA_PARTICIONES_ADELANTE = int(os.getenv("LECTURA_PARTICIONES_ADELANTE", "3"))
+
+
+def _dias_entre(posterior, anterior):
+    return func.floor(func.extract("epoch", posterior - anterior) / 86400)
+
+
+def consulta_resumen(*condiciones):
+    """
+    Filas de lectura_resumen calculadas desde el historial de sesiones finalizadas
+    (para reconstruir la tabla; en uso normal la mantiene finalizar_sesion).
+    """
+    anterior = func.lag(LecturaSesion.ls_fecha_inicial).over(
+        partition_by=(LecturaSesion.ls_idusuario, LecturaSesion.ls_idlibro),
+        order_by=LecturaSesion.ls_fecha_inicial,
+    )
+    duracion = func.extract("epoch", LecturaSesion.ls_fecha_final - LecturaSesion.ls_fecha_inicial)
+    sesiones = (
+        select(
+            LecturaSesion.ls_idusuario,
+            LecturaSesion.ls_idlibro,
+            LecturaSesion.ls_fecha_inicial,
+            LecturaSesion.ls_fecha_final,
+            duracion.label("segundos"),
+            func.floor(duracion / 60).label("minutos"),
+            _dias_entre(LecturaSesion.ls_fecha_inicial, anterior).label("dias"),
+        )
+        .where(LecturaSesion.ls_fecha_final.isnot(None), *condiciones)
+        .subquery()
+    )
+    return (
+        select(
+            sesiones.c.ls_idusuario,
+            sesiones.c.ls_idlibro,
+            func.count(),
+            func.sum(sesiones.c.segundos),
+            func.sum(sesiones.c.minutos),
+            func.coalesce(func.sum(sesiones.c.dias), 0),
+            func.min(sesiones.c.ls_fecha_inicial),
+            func.max(sesiones.c.ls_fecha_inicial),
+            func.max(sesiones.c.ls_fecha_final),
+        )
+        .group_by(sesiones.c.ls_idusuario, sesiones.c.ls_idlibro)
+    )
+
+
+# Orden de las columnas de consulta_resumen, para INSERT ... SELECT
+COLUMNAS_RESUMEN = [
+    "lr_idusuario", "lr_idlibro", "lr_sesiones", "lr_segundos", "lr_minutos",
+    "lr_suma_dias", "lr_primera_sesion", "lr_ultima_sesion", "lr_ultimo_final",
+]
+
+
+def combinar_resumen(tabla, sentencia):
+    """
+    Completa un INSERT de filas de resumen sobre `tabla` (LecturaResumen o LecturaResumenArchivado)
+    para que, si la fila ya existe, se sumen ambos acumulados como si fueran un solo historial.
+    """
+    nueva = sentencia.excluded
+    # Días entre los dos tramos: del último inicio del anterior al primero del posterior
+    entre_tramos = _dias_entre(
+        func.greatest(tabla.lr_primera_sesion, nueva.lr_primera_sesion),
+        func.least(tabla.lr_ultima_sesion, nueva.lr_ultima_sesion),
+    )
+    return sentencia.on_conflict_do_update(
+        index_elements=[tabla.lr_idusuario, tabla.lr_idlibro],
+        set_={
+            "lr_sesiones": tabla.lr_sesiones + nueva.lr_sesiones,
+            "lr_segundos": tabla.lr_segundos + nueva.lr_segundos,
+            "lr_minutos": tabla.lr_minutos + nueva.lr_minutos,
+            # Se asume que los tramos no se solapan (las sesiones se cierran en orden de inicio y se
+            # archivan de la más vieja a la más nueva); si no, reconstruir_resumen recalcula el valor exacto
+            "lr_suma_dias": tabla.lr_suma_dias + nueva.lr_suma_dias
+                + func.coalesce(func.greatest(entre_tramos, 0), 0),
+            "lr_primera_sesion": func.least(tabla.lr_primera_sesion, nueva.lr_primera_sesion),
+            "lr_ultima_sesion": func.greatest(tabla.lr_ultima_sesion, nueva.lr_ultima_sesion),
+            "lr_ultimo_final": func.greatest(tabla.lr_ultimo_final, nueva.lr_ultimo_final),
+        },
+    )
+
+
+def sumar_al_resumen(sesion: LecturaSesion):
+    """Upsert que agrega una sesión recién finalizada al resumen de su usuario y libro."""
+    duracion = (sesion.ls_fecha_final - sesion.ls_fecha_inicial).total_seconds()
+    return combinar_resumen(LecturaResumen, insert(LecturaResumen).values(
+        lr_idusuario=sesion.ls_idusuario,
+        lr_idlibro=sesion.ls_idlibro,
+        lr_sesiones=1,
+        lr_segundos=duracion,
+        lr_minutos=int(duracion // 60),
+        lr_suma_dias=0,
+        lr_primera_sesion=sesion.ls_fecha_inicial,
+        lr_ultima_sesion=sesion.ls_fecha_inicial,
+        lr_ultimo_final=sesion.ls_fecha_final,
+    ))
+
+
+def nombre_particion(mes: date) -> str:
+    return f"lectura_sesion_{mes:%Y_%m}"
+
+
+def sumar_meses(mes: date, cantidad: int) -> date:
+    indice = mes.year * 12 + mes.month - 1 + cantidad
+    return date(indice // 12, indice % 12 + 1, 1)
+
+
+async def crear_particiones():
+    """Crea las particiones mensuales de lectura_sesion que falten, hasta LECTURA_PARTICIONES_ADELANTE meses."""
+    hoy = date.today()
+    mes_actual = date(hoy.year, hoy.month, 1)
+    async with async_engine.begin() as conn:
+        existentes = set((await conn.execute(text(
+            "SELECT c.relname FROM pg_inherits i JOIN pg_class c ON c.oid = i.inhrelid "
+            "WHERE i.inhparent = 'lectura_sesion'::regclass"
+        ))).scalars())
+        for desplazamiento in range(LECTURA_PARTICIONES_ADELANTE + 1):
+            mes = sumar_meses(mes_actual, desplazamiento)
+            # Solo las que faltan: crear una partición bloquea la tabla aunque lleve IF NOT EXISTS
+            if nombre_particion(mes) in existentes:
+                continue
+            await conn.execute(text(
+                f"CREATE TABLE IF NOT EXISTS {nombre_particion(mes)} PARTITION OF lectura_sesion "
+                f"FOR VALUES FROM ('{mes}') TO ('{sumar_meses(mes, 1)}')"
+            ))
+
+
+def _registrar_latidos(latidos: dict):
+    """UPDATE ... FROM (VALUES ...) con el último latido de cada sesión abierta del usuario."""
+    lote = values(
+        column("ls_id", Integer), column("usuario", Integer), column("actividad", DateTime), name="latidos"
+    ).data([(sesion_id, usuario_id, momento) for sesion_id, (usuario_id, momento) in latidos.items()])
+    return (
+        update(LecturaSesion)
+        .where(
+            LecturaSesion.ls_id == lote.c.ls_id,
+            LecturaSesion.ls_idusuario == lote.c.usuario,
+            LecturaSesion.ls_fecha_final.is_(None),
+        )
+        .values(ls_ultima_actividad=func.greatest(LecturaSesion.ls_ultima_actividad, lote.c.actividad))
+    )
+
+
+class BufferLatidos:
+    """
+    Último latido de cada sesión, en memoria; `vaciar` los escribe todos en una sola
+    sentencia. Igual que el buffer de progreso, es por proceso.
+    """
+
+    def __init__(self):
+        self._pendientes: dict = {}
+        self._en_vuelo: dict = {}
+
+    def registrar(self, sesion_id: int, usuario_id: int, momento: datetime):
+        self._pendientes[sesion_id] = (usuario_id, momento)
+
+    def obtener(self, sesion_id: int) -> Optional[datetime]:
+        latido = self._pendientes.get(sesion_id) or self._en_vuelo.get(sesion_id)
+        return latido[1] if latido else None
+
+    async def vaciar(self):
+        if not self._pendientes or self._en_vuelo:
+            return
+        self._en_vuelo, self._pendientes = self._pendientes, {}
+        try:
+            async with async_engine.begin() as conn:
+                await conn.execute(_registrar_latidos(self._en_vuelo))
+        except BaseException:
+            for clave, valor in self._en_vuelo.items():
+                self._pendientes.setdefault(clave, valor)
+            raise
+        finally:
+            self._en_vuelo = {}
+
+
+buffer_latidos = BufferLatidos()
+
+
+async def cerrar_sesiones_inactivas() -> int:
+    """Cierra, en su último latido, las sesiones abiertas que dejaron de enviarlos."""
+    await buffer_latidos.vaciar()
+    limite = datetime.utcnow() - timedelta(minutes=LECTURA_INACTIVIDAD_MINUTOS)
+    total = 0
+    while True:
+        async with AsyncSession(async_engine, expire_on_commit=False) as session:
+            cerradas = await LecturaSesionServicio(session).cerrar_inactivas(limite, LECTURA_BARRIDO_LOTE)
+        total += cerradas
+        if cerradas < LECTURA_BARRIDO_LOTE:
+            return total
+
 
 class LecturaSesionServicio:
-    def __init__(self, db: Session):
+    def __init__(self, db: AsyncSession):
         self.db = db
 
-    def iniciar_sesion(self, usuario_id: int, libro_id: int) -> LecturaSesion:
-
-        sesion_abierta = (
-            self.db.query(LecturaSesion)
-            .filter(
+    async def iniciar_sesion(self, usuario_id: int, libro_id: int) -> LecturaSesion:
+        ahora = datetime.utcnow()
+        sesion_abierta = (await self.db.exec(
+            select(LecturaSesion)
+            .where(
                 LecturaSesion.ls_idusuario == usuario_id,
                 LecturaSesion.ls_idlibro == libro_id,
                 LecturaSesion.ls_fecha_final.is_(None)
             )
-            .first()
-        )
+        )).first()
         if sesion_abierta:
-            return sesion_abierta  # No crea una nueva, retorna la existente
-        
+            actividad = max(
+                buffer_latidos.obtener(sesion_abierta.ls_id) or datetime.min,
+                sesion_abierta.ls_ultima_actividad or sesion_abierta.ls_fecha_inicial,
+            )
+            if actividad >= ahora - timedelta(minutes=LECTURA_INACTIVIDAD_MINUTOS):
+                buffer_latidos.registrar(sesion_abierta.ls_id, usuario_id, ahora)
+                return sesion_abierta  # No crea una nueva, retorna la existente
+            # Quedó abierta sin latidos: se cierra en su última actividad y se empieza otra
+            await self._cerrar(sesion_abierta, actividad)
+
         nueva_sesion = LecturaSesion(
             ls_idusuario=usuario_id,
             ls_idlibro=libro_id,
-            ls_fecha_inicial=datetime.utcnow(),
-            ls_fecha_final=None
+            ls_fecha_inicial=ahora,
+            ls_fecha_final=None,
+            ls_ultima_actividad=ahora,
         )
         self.db.add(nueva_sesion)
-        self.db.commit()
-        self.db.refresh(nueva_sesion)
+        await self.db.commit()
+        await self.db.refresh(nueva_sesion)
         return nueva_sesion
 
-    def finalizar_sesion(self, sesion_id: int, usuario_id: int) -> LecturaSesion:
-        sesion = self.db.get(LecturaSesion, sesion_id)
+    async def _cerrar(self, sesion: LecturaSesion, momento: datetime) -> Optional[LecturaSesion]:
+        # Cierre condicional: dos peticiones simultáneas no pueden sumar la sesión dos veces al resumen.
+        # La fecha de inicio limita el UPDATE a la partición de la sesión
+        sesion = (await self.db.exec(
+            update(LecturaSesion)
+            .where(
+                LecturaSesion.ls_id == sesion.ls_id,
+                LecturaSesion.ls_fecha_inicial == sesion.ls_fecha_inicial,
+                LecturaSesion.ls_fecha_final.is_(None),
+            )
+            .values(ls_fecha_final=momento, ls_ultima_actividad=momento)
+            .returning(LecturaSesion)
+            .execution_options(populate_existing=True)
+        )).scalars().first()
+        if sesion:
+            await self.db.exec(sumar_al_resumen(sesion))
+        return sesion
+
+    async def finalizar_sesion(self, sesion_id: int, usuario_id: int) -> LecturaSesion:
+        sesion = (await self.db.exec(select(LecturaSesion).where(LecturaSesion.ls_id == sesion_id))).first()
         if not sesion:
             raise Exception("Sesión no encontrada")
         if sesion.ls_idusuario != usuario_id:
             raise Exception("No autorizado para finalizar esta sesión")
         if sesion.ls_fecha_final is not None:
             raise Exception("Sesión ya finalizada")
-        sesion.ls_fecha_final = datetime.utcnow()
-        self.db.add(sesion)
-        self.db.commit()
-        self.db.refresh(sesion)
+        sesion = await self._cerrar(sesion, datetime.utcnow())
+        if sesion is None:
+            raise Exception("Sesión ya finalizada")
+        await self.db.commit()
         return sesion
 
-    def tiempo_total_libro(self, usuario_id: int, libro_id: int) -> int:
-        # Suma de minutos leídos para este usuario y libro
-        sesiones = (
-            self.db.query(LecturaSesion)
-            .filter(
-                LecturaSesion.ls_idusuario == usuario_id,
-                LecturaSesion.ls_idlibro == libro_id,
-                LecturaSesion.ls_fecha_final.isnot(None)
-            )
-            .all()
-        )
-        total_minutos = 0
-        for sesion in sesiones:
-            minutos = int((sesion.ls_fecha_final - sesion.ls_fecha_inicial).total_seconds() // 60)
-            total_minutos += minutos
-        return total_minutos
+    async def registrar_latido(self, sesion_id: int, usuario_id: int):
+        # Sesiones ajenas o ya cerradas no coinciden con el UPDATE: no hace falta consultarlas antes
+        if LATIDOS_BUFFER_MS > 0:
+            buffer_latidos.registrar(sesion_id, usuario_id, datetime.utcnow())
+            return
+        await self.db.exec(_registrar_latidos({sesion_id: (usuario_id, datetime.utcnow())}))
+        await self.db.commit()
 
-    def intermitencia_libro(self, usuario_id: int, libro_id: int) -> float:
-        # Promedio de días entre sesiones para este usuario/libro
-        sesiones = (
-            self.db.query(LecturaSesion)
-            .filter(
-                LecturaSesion.ls_idusuario == usuario_id,
-                LecturaSesion.ls_idlibro == libro_id,
-                LecturaSesion.ls_fecha_final.isnot(None)
-            )
-            .order_by(LecturaSesion.ls_fecha_inicial.asc())
-            .all()
-        )
-        if len(sesiones) < 2:
-            return 0.0
-        dias = []
-        for i in range(1, len(sesiones)):
-            d = (sesiones[i].ls_fecha_inicial - sesiones[i-1].ls_fecha_inicial).days
-            dias.append(d)
-        return round(sum(dias) / len(dias), 2)
-    
-    def calcular_intermitencia(db, usuario_id, libro_id):
-        # Trae todas las sesiones de ese usuario y libro, ordenadas por fecha inicial
-        sesiones = (
-            db.query(LecturaSesion)
-            .filter(LecturaSesion.ls_idusuario == usuario_id,
-                    LecturaSesion.ls_idlibro == libro_id)
-            .order_by(asc(LecturaSesion.ls_fecha_inicial))
-            .all()
+    async def cerrar_inactivas(self, limite: datetime, cantidad: int) -> int:
+        # SKIP LOCKED: varios workers pueden barrer a la vez sin tomar las mismas sesiones
+        candidatas = (
+            select(LecturaSesion.ls_id, LecturaSesion.ls_fecha_inicial)
+            .where(LecturaSesion.ls_fecha_final.is_(None), LecturaSesion.ls_ultima_actividad < limite)
+            .limit(cantidad)
+            .with_for_update(skip_locked=True)
         )
+        sesiones = (await self.db.exec(
+            update(LecturaSesion)
+            .where(
+                tuple_(LecturaSesion.ls_id, LecturaSesion.ls_fecha_inicial).in_(candidatas),
+                LecturaSesion.ls_fecha_final.is_(None),
+            )
+            .values(ls_fecha_final=LecturaSesion.ls_ultima_actividad)
+            .returning(LecturaSesion)
+            .execution_options(synchronize_session=False)
+        )).scalars().all()
+        for sesion in sesiones:
+            await self.db.exec(sumar_al_resumen(sesion))
+        await self.db.commit()
+        return len(sesiones)
 
-        if len(sesiones) < 2:
-            return None  # No hay suficiente data para calcular
+    async def metricas_libro(self, usuario_id: int, libro_id: int) -> dict:
+        resumen = await self.db.get(LecturaResumen, (usuario_id, libro_id))
+        if not resumen:
+            return {"minutos": 0, "intermitencia_dias": 0.0}
+        return {
+            "minutos": resumen.lr_minutos,
+            "intermitencia_dias": round(resumen.lr_suma_dias / (resumen.lr_sesiones - 1), 2) if resumen.lr_sesiones > 1 else 0.0,
+        }
 
-        # Saca el promedio de diferencia de días entre sesiones
-        diferencias = []
-        for i in range(1, len(sesiones)):
-            fecha1 = sesiones[i-1].ls_fecha_inicial
-            fecha2 = sesiones[i].ls_fecha_inicial
-            delta = (fecha2 - fecha1).days
-            if delta > 0:
-                diferencias.append(delta)
+    async def tiempo_total_libro(self, usuario_id: int, libro_id: int) -> int:
+        # Suma de minutos leídos para este usuario y libro
+        return (await self.metricas_libro(usuario_id, libro_id))["minutos"]
 
-        if not diferencias:
-            return None
+    async def intermitencia_libro(self, usuario_id: int, libro_id: int) -> float:
+        # Promedio de días entre sesiones para este usuario/libro
+        return (await self.metricas_libro(usuario_id, libro_id))["intermitencia_dias"]
 
-        promedio = sum(diferencias) / len(diferencias)
-        return promedio  # puede ser float (ej. 2.7 días)
+    async def calcular_intermitencia(self, usuario_id, libro_id):
+        # Promedio de días entre sesiones (incluida la abierta), sin contar las del mismo día
+        anterior = func.lag(LecturaSesion.ls_fecha_inicial).over(order_by=LecturaSesion.ls_fecha_inicial)
+        diferencias = (
+            select(_dias_entre(LecturaSesion.ls_fecha_inicial, anterior).label("dias"))
+            .where(LecturaSesion.ls_idusuario == usuario_id,
+                    LecturaSesion.ls_idlibro == libro_id)
+            .subquery()
+        )
+        promedio = (await self.db.exec(
+            select(func.avg(diferencias.c.dias)).where(diferencias.c.dias > 0)
+        )).one()
+        return float(promedio) if promedio is not None else None  # puede ser float (ej. 2.7 días)
@@ -1,14 +1,28 @@
 # services/servicio_libros.py
 import os
-import uuid
+import json
+import base64
+from datetime import date
+from typing import Optional
+from anyio import to_thread
 from fastapi import HTTPException, UploadFile
-from sqlalchemy.orm import Session
+from sqlmodel import select
+from sqlmodel.ext.asyncio.session import AsyncSession
+from sqlalchemy import update, func, tuple_, text, literal, literal_column, cast, Float, and_, or_, union_all
+from sqlalchemy.dialects.postgresql import TSVECTOR
 from app.models.libro.modelo_libro import Libro, LibroCreate, LibroUpdate
 from app.models.compra.modelo_compra import Compra 
 from app.models.libro.modelo_autor import Autor
 from app.models.libro.modelo_categoria import Categoria
 from app.models.libro.modelo_editorial import Editorial
 from app.models.libro.progreso.modelo_progreso import ProgresoLectura
+from app.database.esquema import CONFIG_BUSQUEDA, DOCUMENTO_BUSQUEDA
+from app.core.cache_core import cache_referencias
+from app.services.servicio_trabajo import TrabajoServicio
+from app.services.servicio_progreso import progreso_vigente
+from app.utils.archivo_utils import guardar_upload, eliminar_si_expirado
+from app.utils.pdf_utils import linealizar_pdf
+from app.utils.imagen_utils import generar_variantes, eliminar_variantes, nombre_variante, FORMATOS_VARIANTE
 
 
 CARPETA_LIBROS = os.path.join("uploads", "books")
@@ -17,113 +31,308 @@ os.makedirs(CARPETA_LIBROS, exist_ok=True)
 os.makedirs(CARPETA_PORTADAS, exist_ok=True)
 
 MAX_FILE_SIZE = 200 * 1024 * 1024
-CHUNK_SIZE = 1024 * 1024
+MAX_PORTADA_SIZE = 5 * 1024 * 1024
+
+TRABAJO_PROCESAR_PDF = "procesar_pdf"
+TRABAJO_VARIANTES_PORTADA = "variantes_portada"
+MAX_PAGINA = 100
+
+# Columnas permitidas para ordenar el catálogo paginado ("relevancia" requiere q)
+ORDENES_CATALOGO = {
+    "fecha": Libro.lib_fecha,
+    "precio": func.coalesce(Libro.lib_precio, 0),
+    "titulo": Libro.lib_titulo,
+}
+
+# Columna tsvector mantenida por el servicio; no se mapea en el modelo para no exponerla en las respuestas
+LIB_BUSQUEDA = literal_column("libro.lib_busqueda", type_=TSVECTOR)
+
+
+def _consulta_busqueda(q: str):
+    return func.websearch_to_tsquery(literal_column(f"'{CONFIG_BUSQUEDA}'"), q)
+
+
+def _relevancia(q: str):
+    # Se castea a double precision para que el valor viaje sin pérdida en el cursor
+    return cast(func.ts_rank_cd(LIB_BUSQUEDA, _consulta_busqueda(q)), Float)
+
+
+def sentencia_indexar_busqueda(condicion: str):
+    return text(f"UPDATE libro SET lib_busqueda = {DOCUMENTO_BUSQUEDA} WHERE {condicion}")
+
+
+def _codificar_cursor(orden: str, direccion: str, valor, lib_id: int) -> str:
+    if isinstance(valor, date):
+        valor = valor.isoformat()
+    datos = json.dumps([orden, direccion, valor, lib_id], separators=(",", ":"))
+    return base64.urlsafe_b64encode(datos.encode()).decode().rstrip("=")
+
+
+def _decodificar_cursor(cursor: str, orden: str, direccion: str):
+    try:
+        relleno = "=" * (-len(cursor) % 4)
+        cur_orden, cur_direccion, valor, lib_id = json.loads(base64.urlsafe_b64decode(cursor + relleno))
+        if (cur_orden, cur_direccion) != (orden, direccion):
+            raise ValueError("El cursor no corresponde al orden solicitado")
+        if orden == "fecha":
+            valor = date.fromisoformat(valor)
+        elif orden == "relevancia":
+            valor = float(valor)
+        return valor, int(lib_id)
+    except (ValueError, TypeError):
+        raise HTTPException(status_code=400, detail="Cursor inválido")
+
+
+def consulta_biblioteca(usuario_id: int):
+    """
+    Compras aprobadas del usuario con su libro, progreso y nombres de autor,
+    categoría y editorial en una sola consulta (más recientes primero).
+    """
+    return (
+        select(Compra, Libro, ProgresoLectura, Autor.aut_nombre, Categoria.cat_nombre, Editorial.edi_nombre)
+        .join(Libro, Libro.lib_id == Compra.com_idlibro)
+        .outerjoin(
+            ProgresoLectura,
+            and_(
+                ProgresoLectura.pro_idlibro == Compra.com_idlibro,
+                ProgresoLectura.pro_idusuario == Compra.com_idusuario,
+            ),
+        )
+        .outerjoin(Autor, Autor.aut_id == Libro.lib_idautor)
+        .outerjoin(Categoria, Categoria.cat_id == Libro.lib_idcategoria)
+        .outerjoin(Editorial, Editorial.edi_id == Libro.lib_ideditorial)
+        .where(Compra.com_idusuario == usuario_id, Compra.com_estado == "approved")
+        .order_by(Compra.com_fecha.desc(), Compra.com_id.desc())
+    )
+
+
+def srcset_portada(base_url: str, libro: Libro) -> Optional[dict]:
+    """Variantes de la portada por formato, en formato srcset ("url 160w, url 320w")."""
+    if not libro.lib_portada or not libro.lib_portada_anchos:
+        return None
+    return {
+        ext: ", ".join(
+            f"{base_url}/uploads/covers/{nombre_variante(libro.lib_portada, ancho, ext)} {ancho}w"
+            for ancho in libro.lib_portada_anchos
+        )
+        for ext in FORMATOS_VARIANTE
+    }
+
 
 class LibroServicio:
-    def __init__(self, session: Session):
+    def __init__(self, session: AsyncSession):
         self.session = session
 
-    def _guardar_archivo(self, file: UploadFile, carpeta: str, ext_permitida: tuple, max_size: int) -> str:
-        if not file.filename.lower().endswith(ext_permitida):
-            raise HTTPException(status_code=400, detail=f"Solo se permiten archivos {ext_permitida}")
-        unique_name = f"{uuid.uuid4().hex}{os.path.splitext(file.filename)[1].lower()}"
-        ruta_destino = os.path.join(carpeta, unique_name)
-
-        total_size = 0
-        with open(ruta_destino, "wb") as buffer:
-            while True:
-                chunk = file.file.read(CHUNK_SIZE)
-                if not chunk:
-                    break
-                total_size += len(chunk)
-                if total_size > max_size:
-                    buffer.close()
-                    os.remove(ruta_destino)
-                    raise HTTPException(status_code=400, detail=f"El archivo excede {max_size/(1024*1024)} MB.")
-                buffer.write(chunk)
-        return unique_name
-
-    def crear_libro(self, file: UploadFile, portada: UploadFile, data: LibroCreate) -> Libro:
+    async def _guardar_archivo(self, file: UploadFile, carpeta: str, ext_permitida: tuple, max_size: int) -> str:
+        return (await guardar_upload(file, carpeta, ext_permitida, max_size)).nombre
+
+    async def _liberar_archivo(self, columna, carpeta: str, nombre: Optional[str]):
+        # Los archivos se comparten entre libros con el mismo contenido: solo se borra sin referencias,
+        # y no si se publicó hace poco (otra subida igual puede estar por guardar su libro)
+        if not nombre:
+            return
+        referencias = (await self.session.exec(select(func.count()).select_from(Libro).where(columna == nombre))).one()
+        if not referencias:
+            await to_thread.run_sync(eliminar_si_expirado, carpeta, nombre)
+
+    async def _liberar_portada(self, nombre: Optional[str], anchos: Optional[list[int]]):
+        # La portada y sus variantes se borran juntas cuando ningún libro la usa
+        if not nombre:
+            return
+        referencias = (await self.session.exec(select(func.count()).select_from(Libro).where(Libro.lib_portada == nombre))).one()
+        if not referencias and await to_thread.run_sync(eliminar_si_expirado, CARPETA_PORTADAS, nombre):
+            if anchos:
+                await to_thread.run_sync(eliminar_variantes, CARPETA_PORTADAS, nombre, anchos)
+
+    async def crear_libro(self, file: UploadFile, portada: UploadFile, data: LibroCreate) -> dict:
         # Guardar PDF
-        pdf_name = self._guardar_archivo(file, CARPETA_LIBROS, (".pdf",), MAX_FILE_SIZE)
+        pdf_name = await self._guardar_archivo(file, CARPETA_LIBROS, (".pdf",), MAX_FILE_SIZE)
         # Guardar portada (opcional)
         portada_name = None
         if portada:
-            portada_name = self._guardar_archivo(portada, CARPETA_PORTADAS, (".jpg", ".jpeg", ".png"), 5 * 1024 * 1024)  # máx 5MB portada
+            portada_name = await self._guardar_archivo(portada, CARPETA_PORTADAS, (".jpg", ".jpeg", ".png"), MAX_PORTADA_SIZE)
 
         libro = Libro.from_orm(data)
         libro.lib_url = pdf_name
         libro.lib_portada = portada_name
         self.session.add(libro)
-        self.session.commit()
-        self.session.refresh(libro)
-        return libro
+        await self.session.flush()
+        await self.session.exec(sentencia_indexar_busqueda("lib_id = :lib_id"), params={"lib_id": libro.lib_id})
+        # Se encola en la misma transacción: no hay libro sin su trabajo ni trabajo sin libro
+        trabajos = TrabajoServicio(self.session)
+        trabajo = trabajos.nuevo_trabajo(TRABAJO_PROCESAR_PDF, {"libro_id": libro.lib_id})
+        trabajo_portada = trabajos.nuevo_trabajo(TRABAJO_VARIANTES_PORTADA, {"libro_id": libro.lib_id}) if portada_name else None
+        await self.session.commit()
+        await self.session.refresh(libro)
+        return {
+            **libro.model_dump(),
+            "trabajo_id": trabajo.tra_id,
+            "trabajo_portada_id": trabajo_portada.tra_id if trabajo_portada else None,
+        }
     
-    def listar_libros(self, q: str = ""):
-        query = self.session.query(Libro)
+    def _filtrar_libros(self, query, q: str = "", idcategoria: Optional[int] = None, idautor: Optional[int] = None, estado: Optional[bool] = None):
         if q:
-            q_pattern = f"%{q}%"
-            query = query.filter(
-                (Libro.lib_titulo.ilike(q_pattern)) | (Libro.lib_descripcion.ilike(q_pattern))
-            )
-        return query.all()
+            query = query.where(LIB_BUSQUEDA.op("@@")(_consulta_busqueda(q)))
+        if idcategoria is not None:
+            query = query.where(Libro.lib_idcategoria == idcategoria)
+        if idautor is not None:
+            query = query.where(Libro.lib_idautor == idautor)
+        if estado is not None:
+            query = query.where(Libro.lib_estado == estado)
+        return query
+
+    async def listar_libros(self, q: str = "", idcategoria: Optional[int] = None, idautor: Optional[int] = None, estado: Optional[bool] = None):
+        query = self._filtrar_libros(select(Libro), q, idcategoria, idautor, estado)
+        if q:
+            query = query.order_by(_relevancia(q).desc(), Libro.lib_id)
+        return (await self.session.exec(query)).all()
+
+    async def listar_libros_paginado(
+        self,
+        q: str = "",
+        orden: str = "fecha",
+        direccion: str = "desc",
+        limite: int = 20,
+        cursor: Optional[str] = None,
+        idcategoria: Optional[int] = None,
+        idautor: Optional[int] = None,
+        estado: Optional[bool] = None,
+    ) -> tuple[list[Libro], Optional[str]]:
+        """
+        Página del catálogo por keyset (columna de orden, lib_id).
+        Retorna los libros y el cursor de la siguiente página (None si no hay más).
+        """
+        if orden == "relevancia" and q:
+            columna = _relevancia(q)
+        else:
+            columna = ORDENES_CATALOGO.get(orden)
+        if columna is None or direccion not in ("asc", "desc"):
+            raise HTTPException(status_code=400, detail="Orden no válido")
+        limite = max(1, min(limite, MAX_PAGINA))
+
+        query = self._filtrar_libros(select(Libro, columna.label("clave")), q, idcategoria, idautor, estado)
+
+        clave = tuple_(columna, Libro.lib_id)
+        if cursor:
+            valor, lib_id = _decodificar_cursor(cursor, orden, direccion)
+            posicion = tuple_(valor, lib_id)
+            query = query.where(clave < posicion if direccion == "desc" else clave > posicion)
+
+        if direccion == "desc":
+            query = query.order_by(columna.desc(), Libro.lib_id.desc())
+        else:
+            query = query.order_by(columna.asc(), Libro.lib_id.asc())
+
+        # Se pide un registro extra para saber si existe una página siguiente
+        filas = (await self.session.exec(query.limit(limite + 1))).all()
+        siguiente = None
+        if len(filas) > limite:
+            filas = filas[:limite]
+            ultimo, valor = filas[-1]
+            siguiente = _codificar_cursor(orden, direccion, valor, ultimo.lib_id)
+        return [libro for libro, _ in filas], siguiente
     
-    def serializar_libros(self, libro: Libro, base_url: str, progreso: ProgresoLectura = None):
-        autor = self.session.query(Autor).filter(Autor.aut_id == libro.lib_idautor).first()
-        categoria = self.session.query(Categoria).filter(Categoria.cat_id == libro.lib_idcategoria).first()
-        editorial = self.session.query(Editorial).filter(Editorial.edi_id == libro.lib_ideditorial).first()
+    async def sugerencias(self, q: str, limite: int = 8) -> list[dict]:
+        """
+        Autocompletado de títulos y autores con índices de trigramas:
+        coincidencia por prefijo o por similitud de palabra (tolera errores de escritura).
+        """
+        termino = q.strip().lower()
+        prefijo = termino.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_") + "%"
+
+        titulo = func.lower(Libro.lib_titulo)
+        nombre = func.lower(Autor.aut_nombre)
+        libros = select(
+            literal("libro").label("tipo"),
+            Libro.lib_id.label("id"),
+            Libro.lib_titulo.label("texto"),
+            func.word_similarity(termino, titulo).label("puntaje"),
+        ).where(or_(titulo.op("%>")(termino), titulo.like(prefijo)))
+        autores = select(
+            literal("autor").label("tipo"),
+            Autor.aut_id.label("id"),
+            Autor.aut_nombre.label("texto"),
+            func.word_similarity(termino, nombre).label("puntaje"),
+        ).where(or_(nombre.op("%>")(termino), nombre.like(prefijo)))
+
+        candidatos = union_all(libros, autores).subquery()
+        filas = (await self.session.exec(
+            select(candidatos.c.tipo, candidatos.c.id, candidatos.c.texto)
+            .order_by(candidatos.c.puntaje.desc(), candidatos.c.texto)
+            .limit(limite)
+        )).all()
+        return [{"tipo": tipo, "id": id, "texto": texto} for tipo, id, texto in filas]
+
+    def _formatear_libro(self, libro: Libro, base_url: str, autor: str = None, categoria: str = None, editorial: str = None, progreso: ProgresoLectura = None):
         return {
             "id": libro.lib_id,
             "titulo": libro.lib_titulo,
             "descripcion": libro.lib_descripcion,
-            "autor": autor.aut_nombre if autor else None,
+            "autor": autor,
             "idautor": libro.lib_idautor,
-            "categoria": categoria.cat_nombre if categoria else None,
+            "categoria": categoria,
             "idcategoria": libro.lib_idcategoria,
-            "editorial": editorial.edi_nombre if editorial else None,
+            "editorial": editorial,
             "ideditorial": libro.lib_ideditorial,
             "precio": libro.lib_precio,
              "descuento": libro.lib_descuento,
             "portada": f"{base_url}/uploads/covers/{libro.lib_portada}" if libro.lib_portada else None,
-            "url": f"{base_url}/uploads/books/{libro.lib_url}" if libro.lib_url else None,
+            "portada_srcset": srcset_portada(base_url, libro),
+            "url": f"{base_url}/libros/{libro.lib_id}/pdf" if libro.lib_url else None,
             "progreso_pagina_actual": progreso.pro_pagina_actual if progreso else 0,
-            "progreso_pagina_total": progreso.pro_pagina_total if progreso else getattr(libro, "lib_total_paginas", 0),
+            "progreso_pagina_total": progreso.pro_pagina_total if progreso else (libro.lib_total_paginas or 0),
             "estado": libro.lib_estado,
         }
 
-    def listar_libro_id(self, libro_id: int, user_id: int, base_url: str = ""):
-        libro = (
-            self.session.query(Libro)
-            .filter(Libro.lib_id == libro_id)
-            .first()
-        )
+    async def serializar_libros(self, libro: Libro, base_url: str, progreso: ProgresoLectura = None):
+        return (await self.serializar_lista_libros([libro], base_url, {libro.lib_id: progreso}))[0]
+
+    async def serializar_lista_libros(self, libros: list[Libro], base_url: str, progresos: dict = None):
+        # Autor, categoría y editorial se resuelven desde la caché de referencias
+        progresos = progresos or {}
+        resultado = []
+        for libro in libros:
+            autor = await cache_referencias.obtener_async(self.session, Autor, libro.lib_idautor)
+            categoria = await cache_referencias.obtener_async(self.session, Categoria, libro.lib_idcategoria)
+            editorial = await cache_referencias.obtener_async(self.session, Editorial, libro.lib_ideditorial)
+            resultado.append(self._formatear_libro(
+                libro,
+                base_url,
+                autor.aut_nombre if autor else None,
+                categoria.cat_nombre if categoria else None,
+                editorial.edi_nombre if editorial else None,
+                progresos.get(libro.lib_id),
+            ))
+        return resultado
+
+    async def listar_libro_id(self, libro_id: int, user_id: int, base_url: str = ""):
+        libro = await self.session.get(Libro, libro_id)
         if not libro:
             return None
 
-        autor = self.session.query(Autor).filter(Autor.aut_id == libro.lib_idautor).first()
-        categoria = self.session.query(Categoria).filter(Categoria.cat_id == libro.lib_idcategoria).first()
-        editorial = self.session.query(Editorial).filter(Editorial.edi_id == libro.lib_ideditorial).first()
+        autor = await cache_referencias.obtener_async(self.session, Autor, libro.lib_idautor)
+        categoria = await cache_referencias.obtener_async(self.session, Categoria, libro.lib_idcategoria)
+        editorial = await cache_referencias.obtener_async(self.session, Editorial, libro.lib_ideditorial)
 
-        compra = (
-            self.session.query(Compra)
-            .filter(
+        compra = (await self.session.exec(
+            select(Compra)
+            .where(
                 Compra.com_idusuario == user_id,
                 Compra.com_idlibro == libro_id,
                 Compra.com_estado == "approved"
             )
-            .first()
-        )
+        )).first()
 
         progreso = None
         if compra:
-            progreso = (
-                self.session.query(ProgresoLectura)
-                .filter(
+            progreso = (await self.session.exec(
+                select(ProgresoLectura)
+                .where(
                     ProgresoLectura.pro_idusuario == user_id,
                     ProgresoLectura.pro_idlibro == libro_id
                 )
-                .first()
-            )
+            )).first()
+            progreso = progreso_vigente(user_id, libro_id, progreso)
 
 
     
@@ -136,84 +345,142 @@ class LibroServicio:
             "descuento": libro.lib_descuento,
             "estado": libro.lib_estado,
             "portada": f"{base_url}/uploads/covers/{libro.lib_portada}" if libro.lib_portada else None,
-            "url": f"{base_url}/uploads/books/{libro.lib_url}" if libro.lib_url else None,
+            "portada_srcset": srcset_portada(base_url, libro),
+            "url": f"{base_url}/libros/{libro.lib_id}/pdf" if libro.lib_url else None,
             "autor": autor.aut_nombre if autor else None,
             "categoria": categoria.cat_nombre if categoria else None,
             "editorial": editorial.edi_nombre if editorial else None,
             "comprado": bool(compra),
             "progreso_pagina_actual": progreso.pro_pagina_actual if progreso else 0,
-            "progreso_pagina_total": progreso.pro_pagina_total if progreso else libro.lib_total_paginas if hasattr(libro, 'lib_total_paginas') else 0,
+            "progreso_pagina_total": progreso.pro_pagina_total if progreso else (libro.lib_total_paginas or 0),
         }
 
-    def listar_libros_comprados(self, usuario_id: int, base_url: str):
-        compras = self.session.query(Compra).filter(
-            Compra.com_idusuario == usuario_id,
-            Compra.com_estado == "approved"
-        ).all()
-        libro_ids = [c.com_idlibro for c in compras]
-        if not libro_ids:
-            return []
+    async def listar_libros_comprados(self, usuario_id: int, base_url: str):
+        resultado = []
+        vistos = set()
+        for _, libro, progreso, autor, categoria, editorial in (await self.session.exec(consulta_biblioteca(usuario_id))).all():
+            # Un libro comprado más de una vez se muestra una sola vez
+            if libro.lib_id in vistos:
+                continue
+            vistos.add(libro.lib_id)
+            progreso = progreso_vigente(usuario_id, libro.lib_id, progreso)
+            resultado.append(self._formatear_libro(libro, base_url, autor, categoria, editorial, progreso))
+        return resultado
+    
+    async def procesar_pdf(self, libro_id: int):
+        """Linealiza el PDF del libro y guarda su número de páginas."""
+        libro = await self.session.get(Libro, libro_id)
+        if not libro or not libro.lib_url:
+            return
+        original = libro.lib_url
+        procesado = await to_thread.run_sync(linealizar_pdf, CARPETA_LIBROS, original)
 
-        libros = self.session.query(Libro).filter(Libro.lib_id.in_(libro_ids)).all()
+        # Solo si nadie reemplazó el PDF mientras se procesaba
+        resultado = await self.session.exec(
+            update(Libro)
+            .where(Libro.lib_id == libro_id, Libro.lib_url == original)
+            .values(lib_url=procesado.nombre, lib_total_paginas=procesado.paginas)
+        )
+        await self.session.commit()
+        if not resultado.rowcount:
+            await self._liberar_archivo(Libro.lib_url, CARPETA_LIBROS, procesado.nombre)
+        elif procesado.nombre != original:
+            await self._liberar_archivo(Libro.lib_url, CARPETA_LIBROS, original)
 
-        resultado = []
-        for libro in libros:
-            progreso = (
-                self.session.query(ProgresoLectura)
-                .filter(
-                    ProgresoLectura.pro_idusuario == usuario_id,
-                    ProgresoLectura.pro_idlibro == libro.lib_id
-                )
-                .first()
+    async def generar_variantes_portada(self, libro_id: int):
+        """Genera las variantes de ancho fijo de la portada y registra los anchos disponibles."""
+        libro = await self.session.get(Libro, libro_id)
+        if not libro or not libro.lib_portada:
+            return
+        portada = libro.lib_portada
+        anchos = await to_thread.run_sync(generar_variantes, CARPETA_PORTADAS, portada)
+        await self.session.exec(
+            update(Libro)
+            .where(Libro.lib_id == libro_id, Libro.lib_portada == portada)
+            .values(lib_portada_anchos=anchos)
+        )
+        await self.session.commit()
+
+    async def archivo_pdf(self, libro_id: int, usuario_id: int) -> tuple[Libro, str]:
+        """Retorna el libro y la ruta de su PDF si el usuario tiene una compra aprobada."""
+        libro = await self.session.get(Libro, libro_id)
+        if not libro or not libro.lib_url:
+            raise HTTPException(status_code=404, detail="Libro no encontrado")
+
+        compra = (await self.session.exec(
+            select(Compra.com_id)
+            .where(
+                Compra.com_idusuario == usuario_id,
+                Compra.com_idlibro == libro_id,
+                Compra.com_estado == "approved"
             )
-            data = self.serializar_libros(libro, base_url, progreso)
-            resultado.append(data)
+            .limit(1)
+        )).first()
+        if not compra:
+            raise HTTPException(status_code=403, detail="No has adquirido este libro")
 
-        return resultado
-    
-    def actualizar_libro(self, libro_id: int, data: "LibroUpdate", file: UploadFile = None, portada: UploadFile = None) -> Libro:
-        libro = self.session.query(Libro).filter(Libro.lib_id == libro_id).first()
+        ruta = os.path.join(CARPETA_LIBROS, libro.lib_url)
+        if not await to_thread.run_sync(os.path.isfile, ruta):
+            raise HTTPException(status_code=404, detail="Archivo del libro no encontrado")
+        return libro, ruta
+
+    async def actualizar_libro(self, libro_id: int, data: "LibroUpdate", file: UploadFile = None, portada: UploadFile = None) -> dict:
+        libro = await self.session.get(Libro, libro_id)
         if not libro:
             raise HTTPException(status_code=404, detail="Libro no encontrado")
 
         # Validar si se manda un autor nuevo
         if data.lib_idautor is not None:
-            autor = self.session.query(Autor).filter(Autor.aut_id == data.lib_idautor).first()
+            autor = await self.session.get(Autor, data.lib_idautor)
             if not autor:
                 raise HTTPException(status_code=400, detail="El autor no existe")
 
         # Validar si se manda una categoría nueva
         if data.lib_idcategoria is not None:
-            categoria = self.session.query(Categoria).filter(Categoria.cat_id == data.lib_idcategoria).first()
+            categoria = await self.session.get(Categoria, data.lib_idcategoria)
             if not categoria:
                 raise HTTPException(status_code=400, detail="La categoría no existe")
 
         # Validar si se manda una editorial nueva
         if data.lib_ideditorial is not None:
-            editorial = self.session.query(Editorial).filter(Editorial.edi_id == data.lib_ideditorial).first()
+            editorial = await self.session.get(Editorial, data.lib_ideditorial)
             if not editorial:
                 raise HTTPException(status_code=400, detail="La editorial no existe")
 
+        pdf_anterior, portada_anterior, anchos_anteriores = libro.lib_url, libro.lib_portada, libro.lib_portada_anchos
+        trabajo = trabajo_portada = None
+
         # Actualizar PDF si se envía
         if file:
-            pdf_name = self._guardar_archivo(file, CARPETA_LIBROS, (".pdf",), MAX_FILE_SIZE)
+            pdf_name = await self._guardar_archivo(file, CARPETA_LIBROS, (".pdf",), MAX_FILE_SIZE)
             libro.lib_url = pdf_name
+            libro.lib_total_paginas = None
+            trabajo = TrabajoServicio(self.session).nuevo_trabajo(TRABAJO_PROCESAR_PDF, {"libro_id": libro.lib_id})
 
         # Actualizar portada si se envía
         if portada:
-            portada_name = self._guardar_archivo(portada, CARPETA_PORTADAS, (".jpg", ".jpeg", ".png"), 5 * 1024 * 1024)
+            portada_name = await self._guardar_archivo(portada, CARPETA_PORTADAS, (".jpg", ".jpeg", ".png"), MAX_PORTADA_SIZE)
             libro.lib_portada = portada_name
+            if portada_name != portada_anterior:
+                libro.lib_portada_anchos = None
+                trabajo_portada = TrabajoServicio(self.session).nuevo_trabajo(TRABAJO_VARIANTES_PORTADA, {"libro_id": libro.lib_id})
 
         # Actualizar solo los campos enviados
         update_data = data.dict(exclude_unset=True)
         for key, value in update_data.items():
             setattr(libro, key, value)
 
+        await self.session.flush()
+        await self.session.exec(sentencia_indexar_busqueda("lib_id = :lib_id"), params={"lib_id": libro.lib_id})
+        await self.session.commit()
+        await self.session.refresh(libro)
 
-        self.session.commit()
-        self.session.refresh(libro)
-        return libro
-
-
-    
-
+        if libro.lib_url != pdf_anterior:
+            await self._liberar_archivo(Libro.lib_url, CARPETA_LIBROS, pdf_anterior)
+        if libro.lib_portada != portada_anterior:
+            await self._liberar_portada(portada_anterior, anchos_anteriores)
+        return {
+            **libro.model_dump(),
+            "trabajo_id": trabajo.tra_id if trabajo else None,
+            "trabajo_portada_id": trabajo_portada.tra_id if trabajo_portada else None,
+        }
@@ -1,13 +1,19 @@
 # app/services/servicio_pago.py
-import mercadopago
 import os
+from functools import lru_cache
 from dotenv import load_dotenv
 
 
 load_dotenv()
 
 ACCESS_TOKEN = os.getenv("MP_ACCESS_TOKEN_PROD")
-sdk = mercadopago.SDK(ACCESS_TOKEN)
+
+
+@lru_cache(maxsize=1)
+def sdk_mercadopago():
+    # El SDK (y requests) se carga con el primer pago, no al importar la app
+    import mercadopago
+    return mercadopago.SDK(ACCESS_TOKEN)
 
 def crear_preferencia_pago(nombre_producto: str, precio: float, descuento: float, usuario_id: int, libro_id: int, cantidad: int = 1) -> str:
 
@@ -38,7 +44,7 @@ def crear_preferencia_pago(nombre_producto: str, precio: float, descuento: float
     }
 
     try:
-        response = sdk.preference().create(preference_data)
+        response = sdk_mercadopago().preference().create(preference_data)
         link = response["response"]["init_point"]
         return link, reference, precio_final
     except Exception as e:
@@ -1,41 +1,149 @@
 # app/services/servicio_progreso.py
+import os
+from typing import Optional
+from fastapi import HTTPException
 from app.models.libro.progreso.modelo_progreso import ProgresoLectura, ProgresoLecturaCreate
-from sqlalchemy.orm import Session
+from app.database.database import async_engine
+from sqlmodel.ext.asyncio.session import AsyncSession
 from sqlmodel import select
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.exc import DataError, IntegrityError
+
+# Cada cuántos milisegundos se escribe el progreso acumulado; 0 escribe en cada petición
+PROGRESO_BUFFER_MS = int(os.getenv("PROGRESO_BUFFER_MS", "500"))
+
+
+def upsert_progreso(filas: list):
+    """
+    INSERT ... ON CONFLICT DO UPDATE sobre el índice único (usuario, libro): una sola
+    sentencia, sin la carrera de consultar y después insertar.
+    """
+    sentencia = insert(ProgresoLectura).values(filas)
+    return sentencia.on_conflict_do_update(
+        index_elements=[ProgresoLectura.pro_idusuario, ProgresoLectura.pro_idlibro],
+        set_={
+            "pro_pagina_actual": sentencia.excluded.pro_pagina_actual,
+            "pro_pagina_total": sentencia.excluded.pro_pagina_total,
+        },
+    )
+
+
+class BufferProgreso:
+    """
+    Buffer de escritura diferida del progreso de lectura. Cada cambio de página reemplaza
+    al anterior del mismo (usuario, libro), y `vaciar` escribe lo acumulado en un solo
+    INSERT ... ON CONFLICT DO UPDATE. Es por proceso: con varios workers de uvicorn cada
+    uno tiene el suyo.
+    """
+
+    def __init__(self):
+        self._pendientes: dict = {}
+        # Lo que se está escribiendo: sigue visible para las lecturas hasta confirmarse
+        self._en_vuelo: dict = {}
+
+    def registrar(self, usuario_id: int, datos: ProgresoLecturaCreate):
+        self._pendientes[(usuario_id, datos.pro_idlibro)] = (datos.pro_pagina_actual, datos.pro_pagina_total)
+
+    def obtener(self, usuario_id: int, libro_id: int) -> Optional[tuple]:
+        clave = (usuario_id, libro_id)
+        return self._pendientes.get(clave) or self._en_vuelo.get(clave)
+
+    def _reencolar(self, claves):
+        # Se reintenta en la próxima pasada, sin pisar cambios más nuevos
+        for clave in claves:
+            self._pendientes.setdefault(clave, self._en_vuelo[clave])
+
+    @staticmethod
+    def _fila(clave, valor) -> dict:
+        (usuario_id, libro_id), (actual, total) = clave, valor
+        return {"pro_idusuario": usuario_id, "pro_idlibro": libro_id, "pro_pagina_actual": actual, "pro_pagina_total": total}
+
+    async def _vaciar_por_fila(self):
+        # Una fila inválida (p. ej. libro borrado) hizo fallar el lote: se escribe cada una por
+        # separado y se descartan solo las que nunca van a poder guardarse
+        claves = list(self._en_vuelo)
+        for indice, clave in enumerate(claves):
+            try:
+                async with async_engine.begin() as conn:
+                    await conn.execute(upsert_progreso([self._fila(clave, self._en_vuelo[clave])]))
+            except (IntegrityError, DataError) as e:
+                print(f"Progreso descartado (usuario {clave[0]}, libro {clave[1]}): {e.orig}")
+            except BaseException:
+                self._reencolar(claves[indice:])
+                raise
+
+    async def vaciar(self):
+        if not self._pendientes or self._en_vuelo:
+            return
+        self._en_vuelo, self._pendientes = self._pendientes, {}
+        try:
+            filas = [self._fila(clave, valor) for clave, valor in self._en_vuelo.items()]
+            async with async_engine.begin() as conn:
+                await conn.execute(upsert_progreso(filas))
+        except (IntegrityError, DataError):
+            await self._vaciar_por_fila()
+        except BaseException:
+            self._reencolar(list(self._en_vuelo))
+            raise
+        finally:
+            self._en_vuelo = {}
+
+
+buffer_progreso = BufferProgreso()
+
+
+def progreso_vigente(usuario_id: int, libro_id: int, progreso: Optional[ProgresoLectura]) -> Optional[ProgresoLectura]:
+    """Aplica sobre la fila leída lo que todavía está en el buffer (más reciente)."""
+    pendiente = buffer_progreso.obtener(usuario_id, libro_id)
+    if not pendiente:
+        return progreso
+    actual, total = pendiente
+    # Copia desacoplada: no se debe marcar como modificada la fila de la sesión
+    return ProgresoLectura(
+        pro_id=progreso.pro_id if progreso else None,
+        pro_idusuario=usuario_id,
+        pro_idlibro=libro_id,
+        pro_pagina_actual=actual,
+        pro_pagina_total=total,
+    )
+
 
 class ProgresoLecturaServicio:
-    def __init__(self, db: Session):
+    def __init__(self, db: AsyncSession):
         self.db = db
 
-    def obtener_progreso(self, usuario_id: int, libro_id: int):
+    async def obtener_progreso(self, usuario_id: int, libro_id: int):
         stmt = select(ProgresoLectura).where(
             ProgresoLectura.pro_idusuario == usuario_id,
             ProgresoLectura.pro_idlibro == libro_id
         )
-        return self.db.exec(stmt).first()
+        return progreso_vigente(usuario_id, libro_id, (await self.db.exec(stmt)).first())
 
-    def guardar_o_actualizar_progreso(
+    async def guardar_o_actualizar_progreso(
         self, usuario_id: int, datos: ProgresoLecturaCreate
     ) -> ProgresoLectura:
-        # Buscar si ya existe progreso para ese usuario y libro
-        query = select(ProgresoLectura).where(
-            ProgresoLectura.pro_idusuario == usuario_id,
-            ProgresoLectura.pro_idlibro == datos.pro_idlibro
-        )
-        progreso = self.db.exec(query).first()
-        if progreso:
-            # Actualiza los campos
-            progreso.pro_pagina_actual = datos.pro_pagina_actual
-            progreso.pro_pagina_total = datos.pro_pagina_total
-        else:
-            # Crea nuevo
-            progreso = ProgresoLectura(
+        # Sin consultar el libro antes: con buffer, las filas de libros inexistentes se descartan
+        # al vaciarlo; sin él, la clave foránea rechaza el upsert
+        if PROGRESO_BUFFER_MS > 0:
+            buffer_progreso.registrar(usuario_id, datos)
+            return ProgresoLectura(
                 pro_idusuario=usuario_id,
                 pro_idlibro=datos.pro_idlibro,
                 pro_pagina_actual=datos.pro_pagina_actual,
                 pro_pagina_total=datos.pro_pagina_total,
             )
-            self.db.add(progreso)
-        self.db.commit()
-        self.db.refresh(progreso)
+
+        try:
+            progreso = (await self.db.exec(
+                upsert_progreso([{
+                    "pro_idusuario": usuario_id,
+                    "pro_idlibro": datos.pro_idlibro,
+                    "pro_pagina_actual": datos.pro_pagina_actual,
+                    "pro_pagina_total": datos.pro_pagina_total,
+                }]).returning(ProgresoLectura)
+            )).scalars().one()
+        except IntegrityError:
+            await self.db.rollback()
+            raise HTTPException(status_code=404, detail="Libro no encontrado")
+        await self.db.commit()
         return progreso
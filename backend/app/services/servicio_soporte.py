@@ -1,5 +1,4 @@
 import os
-import httpx
 import asyncio
 import base64
 from datetime import datetime
@@ -19,6 +18,8 @@ async def enviar_ticket_soporte(
     mensaje: str,
     imagen=None
 ):
+    import httpx
+
     if not BREVO_API_KEY or not SENDER_EMAIL:
         raise RuntimeError("Faltan variables de entorno de Brevo")
 
@@ -1,21 +1,29 @@
 # app/services/servicio_texto.py
+import os
+from datetime import datetime
 from typing import List, Optional
-from sqlmodel import Session, select
-from app.models.texto.modelo_texto import Texto, TextoCreate
+from fastapi import HTTPException
+from sqlalchemy import insert, update, delete
+from sqlmodel import select
+from sqlmodel.ext.asyncio.session import AsyncSession
+from app.models.texto.modelo_texto import Texto, TextoCreate, TextoSyncRequest
+
+# Operaciones máximas por lote de /textos/sync
+TEXTOS_SYNC_MAX = int(os.getenv("TEXTOS_SYNC_MAX", "500"))
 
 class TextoServicio:
-    def __init__(self, session: Session):
+    def __init__(self, session: AsyncSession):
         self.session = session
 
-    def listar_libro_id_usuario(self, libro_id: int, usuario_id: int) -> List[Texto]:
-        return self.session.exec(
+    async def listar_libro_id_usuario(self, libro_id: int, usuario_id: int) -> List[Texto]:
+        return (await self.session.exec(
             select(Texto).where(
                 (Texto.txt_idlibro == libro_id) & 
                 (Texto.txt_idusuario == usuario_id)
             )
-        ).all()
+        )).all()
 
-    def crear_texto(self, texto_in: TextoCreate, usuario_id: int) -> Texto:
+    async def crear_texto(self, texto_in: TextoCreate, usuario_id: int) -> Texto:
         texto = Texto(
             txt_idlibro=texto_in.txt_idlibro,
             txt_idusuario=usuario_id,
@@ -28,24 +36,97 @@ class TextoServicio:
             txt_dimension=texto_in.txt_dimension,
         )
         self.session.add(texto)
-        self.session.commit()
-        self.session.refresh(texto)
+        await self.session.commit()
+        await self.session.refresh(texto)
         return texto
     
-    def actualizar_texto(self, texto_id: int, data: dict) -> Optional[Texto]:
-        texto = self.session.get(Texto, texto_id)
+    async def actualizar_texto(self, texto_id: int, data: dict) -> Optional[Texto]:
+        texto = await self.session.get(Texto, texto_id)
         if not texto:
             return None
         for key, value in data.items():
             setattr(texto, key, value)
-        self.session.commit()
-        self.session.refresh(texto)
+        await self.session.commit()
+        await self.session.refresh(texto)
         return texto
 
-    def eliminar_texto(self, texto_id: int) -> bool:
-        texto = self.session.get(Texto, texto_id)
+    async def eliminar_texto(self, texto_id: int) -> bool:
+        texto = await self.session.get(Texto, texto_id)
         if not texto:
             return False
-        self.session.delete(texto)
-        self.session.commit()
+        await self.session.delete(texto)
+        await self.session.commit()
         return True
+
+    async def sincronizar(self, datos: TextoSyncRequest, usuario_id: int) -> dict:
+        """
+        Aplica en una sola transacción los cambios acumulados por el lector: altas con id
+        provisorio, modificaciones y bajas. Si un texto no existe o es de otro usuario no se
+        aplica nada.
+        """
+        if len(datos.crear) + len(datos.actualizar) + len(datos.eliminar) > TEXTOS_SYNC_MAX:
+            raise HTTPException(status_code=400, detail=f"El lote supera las {TEXTOS_SYNC_MAX} operaciones")
+        ahora = datetime.utcnow()
+
+        # Los textos creados en el mismo lote se editan o descartan antes de insertarlos
+        altas = {}
+        for texto in datos.crear:
+            altas[texto.temp_id] = texto.model_dump(exclude={"temp_id"})
+        cambios = {}
+        for cambio in datos.actualizar:
+            valores = cambio.model_dump(exclude_unset=True, exclude={"txt_id", "temp_id", "txt_actualizado"})
+            if cambio.temp_id is not None and cambio.temp_id in altas:
+                altas[cambio.temp_id].update(valores)
+            elif cambio.txt_id is not None:
+                cambios.setdefault(cambio.txt_id, {}).update(valores)
+            else:
+                raise HTTPException(status_code=400, detail="Cada modificación necesita txt_id o un temp_id del lote")
+        bajas = set()
+        for baja in datos.eliminar:
+            if baja.temp_id is not None and baja.temp_id in altas:
+                altas[baja.temp_id] = None
+            elif baja.txt_id is not None:
+                bajas.add(baja.txt_id)
+                cambios.pop(baja.txt_id, None)
+            else:
+                raise HTTPException(status_code=400, detail="Cada baja necesita txt_id o un temp_id del lote")
+
+        # Propiedad de los textos existentes, bloqueados hasta el commit
+        existentes = set(cambios) | bajas
+        if existentes:
+            propios = set((await self.session.exec(
+                select(Texto.txt_id)
+                .where(Texto.txt_id.in_(existentes), Texto.txt_idusuario == usuario_id)
+                .with_for_update()
+            )).all())
+            if propios != existentes:
+                raise HTTPException(status_code=404, detail=f"Textos no encontrados: {sorted(existentes - propios)}")
+
+        ids = {}
+        textos = []
+        nuevos = [(temp_id, valores) for temp_id, valores in altas.items() if valores is not None]
+        if nuevos:
+            # Un INSERT por lote de filas (insertmanyvalues); RETURNING respeta el orden de los parámetros
+            creados = (await self.session.exec(
+                insert(Texto).returning(Texto, sort_by_parameter_order=True),
+                params=[
+                    {**valores, "txt_idusuario": usuario_id, "txt_creado": ahora, "txt_actualizado": ahora}
+                    for _, valores in nuevos
+                ],
+            )).scalars().all()
+            ids = {temp_id: texto.txt_id for (temp_id, _), texto in zip(nuevos, creados)}
+            textos.extend(creados)
+        cambios = {txt_id: valores for txt_id, valores in cambios.items() if valores}
+        if cambios:
+            # UPDATE por clave primaria, agrupado por las columnas que cambian
+            await self.session.exec(
+                update(Texto),
+                params=[{**valores, "txt_id": txt_id, "txt_actualizado": ahora} for txt_id, valores in cambios.items()],
+            )
+            textos.extend((await self.session.exec(
+                select(Texto).where(Texto.txt_id.in_(cambios)).execution_options(populate_existing=True)
+            )).all())
+        if bajas:
+            await self.session.exec(delete(Texto).where(Texto.txt_id.in_(bajas)))
+        await self.session.commit()
+        return {"ids": ids, "textos": textos, "eliminados": sorted(bajas)}
@@ -0,0 +1,95 @@
+# app/services/servicio_trabajo.py
+import os
+import random
+from datetime import datetime, timedelta
+from typing import Optional
+from sqlmodel import select
+from sqlmodel.ext.asyncio.session import AsyncSession
+from sqlalchemy import update, literal_column, DateTime
+from app.models.trabajo.modelo_trabajo import Trabajo
+
+# Tiempo que un worker tiene un trabajo antes de que otro pueda retomarlo (si el primero murió)
+TRABAJO_LEASE_SEGUNDOS = int(os.getenv("TRABAJO_LEASE_SEGUNDOS", "600"))
+TRABAJO_BACKOFF_BASE = int(os.getenv("TRABAJO_BACKOFF_BASE", "10"))
+TRABAJO_BACKOFF_MAXIMO = int(os.getenv("TRABAJO_BACKOFF_MAXIMO", "3600"))
+
+# Hora UTC del servidor de base de datos, comparable con las columnas (sin zona horaria)
+AHORA_UTC = literal_column("(now() AT TIME ZONE 'utc')", type_=DateTime)
+
+
+def backoff(intentos: int) -> timedelta:
+    # Exponencial con jitter para que los reintentos de un lote no coincidan
+    segundos = min(TRABAJO_BACKOFF_BASE * 2 ** max(intentos - 1, 0), TRABAJO_BACKOFF_MAXIMO)
+    return timedelta(seconds=segundos * random.uniform(0.8, 1.2))
+
+
+class TrabajoServicio:
+    def __init__(self, session: AsyncSession):
+        self.session = session
+
+    def nuevo_trabajo(self, tipo: str, payload: dict, max_intentos: int = 5) -> Trabajo:
+        """Agrega el trabajo a la transacción en curso; se encola al hacer commit."""
+        trabajo = Trabajo(tra_tipo=tipo, tra_payload=payload, tra_max_intentos=max_intentos)
+        self.session.add(trabajo)
+        return trabajo
+
+    async def obtener(self, trabajo_id: int) -> Optional[Trabajo]:
+        return await self.session.get(Trabajo, trabajo_id)
+
+    async def reclamar(self) -> Optional[Trabajo]:
+        """
+        Toma el siguiente trabajo disponible. SKIP LOCKED deja que varios workers
+        consulten la cola a la vez sin bloquearse ni tomar el mismo trabajo.
+        """
+        siguiente = (
+            select(Trabajo.tra_id)
+            .where(
+                # en_proceso con lease vencido: el worker que lo tenía no terminó
+                Trabajo.tra_estado.in_(("pendiente", "en_proceso")),
+                Trabajo.tra_disponible <= AHORA_UTC,
+            )
+            .order_by(Trabajo.tra_disponible)
+            .limit(1)
+            .with_for_update(skip_locked=True)
+            .scalar_subquery()
+        )
+        trabajo = (await self.session.exec(
+            update(Trabajo)
+            .where(Trabajo.tra_id == siguiente)
+            .values(
+                tra_estado="en_proceso",
+                tra_intentos=Trabajo.tra_intentos + 1,
+                tra_disponible=AHORA_UTC + timedelta(seconds=TRABAJO_LEASE_SEGUNDOS),
+                tra_actualizado=AHORA_UTC,
+            )
+            .returning(Trabajo)
+        )).scalars().first()
+        await self.session.commit()
+        return trabajo
+
+    def agotado(self, trabajo: Trabajo) -> bool:
+        # Un lease vencido también cuenta como intento
+        return trabajo.tra_intentos > trabajo.tra_max_intentos
+
+    async def completar(self, trabajo: Trabajo):
+        await self._finalizar(trabajo, tra_estado="completado", tra_error=None)
+
+    async def fallar(self, trabajo: Trabajo, error: str):
+        if trabajo.tra_intentos >= trabajo.tra_max_intentos:
+            await self._finalizar(trabajo, tra_estado="fallido", tra_error=error)
+        else:
+            await self._finalizar(
+                trabajo,
+                tra_estado="pendiente",
+                tra_error=error,
+                tra_disponible=datetime.utcnow() + backoff(trabajo.tra_intentos),
+            )
+
+    async def _finalizar(self, trabajo: Trabajo, **valores):
+        # Solo si el lease sigue siendo nuestro (nadie lo retomó por vencimiento)
+        await self.session.exec(
+            update(Trabajo)
+            .where(Trabajo.tra_id == trabajo.tra_id, Trabajo.tra_intentos == trabajo.tra_intentos)
+            .values(tra_actualizado=datetime.utcnow(), **valores)
+        )
+        await self.session.commit()
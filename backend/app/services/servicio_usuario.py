@@ -1,30 +1,33 @@
 from sqlmodel import Session, select
 from sqlalchemy import or_
 from fastapi import BackgroundTasks, HTTPException, status, UploadFile
-from passlib.context import CryptContext
 from jose import jwt, JWTError
 import os
 import uuid
-from PIL import Image
+from typing import Optional
+from anyio import to_thread
 from pathlib import Path
 from app.models.usuario.modelo_usuario import Usuario, UsuarioCreate, UsuarioUpdate
-from app.core.auth_core import generar_token_activacion
+from app.core.auth_core import generar_token_activacion, hash_password, verificar_password
 from app.services.servicio_correo import enviar_correo
-from app.models.libro.modelo_libro import Libro
-from app.models.compra.modelo_compra import Compra
-from app.models.libro.progreso.modelo_progreso import ProgresoLectura
-
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+from app.services.servicio_libro import consulta_biblioteca
+from app.services.servicio_progreso import progreso_vigente
+from app.core.procesos_core import ejecutar_en_proceso
+from app.utils.archivo_utils import guardar_upload, eliminar_archivo
+from app.utils.imagen_utils import optimizar_imagen
 
 SECRET_KEY = os.getenv("SECRET_KEY")
 ALGORITHM = os.getenv("ALGORITHM")
 
+# Límite de píxeles de una imagen de perfil antes de decodificarla (protección contra bombas)
+IMAGEN_MAX_PIXELES = int(os.getenv("IMAGEN_MAX_PIXELES", "25000000"))
+PREFIJO_IMAGENES_PERFIL = "/uploads/profile-images/"
+
 class UsuarioServicio:
     
     def __init__(self):
-
+        # La carpeta se crea al subir la primera imagen, no al instanciar el servicio
         self.upload_directory = Path("uploads/profile-images")
-        self.upload_directory.mkdir(parents=True, exist_ok=True)
 
 
     def registrar_usuario(self, datos: UsuarioCreate, db: Session, background_tasks: BackgroundTasks) -> Usuario:
@@ -49,7 +52,7 @@ class UsuarioServicio:
         usuario = Usuario(
             usu_usuario=datos.usu_usuario,
             usu_correo=datos.usu_correo,
-            usu_clave=pwd_context.hash(datos.usu_clave),
+            usu_clave=hash_password(datos.usu_clave),
             usu_verificado=False,
             usu_idrol=2
         )
@@ -117,7 +120,7 @@ class UsuarioServicio:
         if not usuario:
             raise ValueError("Usuario no encontrado")
 
-        usuario.usu_clave = pwd_context.hash(nueva_clave)
+        usuario.usu_clave = hash_password(nueva_clave)
         db.add(usuario)
         db.commit()
 
@@ -129,17 +132,17 @@ class UsuarioServicio:
             raise HTTPException(status_code=404, detail="Usuario no encontrado")
 
         # 1) verificar contraseña actual
-        if not pwd_context.verify(clave_actual, usuario.usu_clave):
+        if not verificar_password(clave_actual, usuario.usu_clave):
             raise HTTPException(status_code=400, detail="Contraseña actual incorrecta")
 
         # 2) reglas mínimas (opcional)
         if len(nueva_clave) < 8:
             raise HTTPException(status_code=400, detail="La nueva contraseña debe tener al menos 8 caracteres")
-        if pwd_context.verify(nueva_clave, usuario.usu_clave):
+        if verificar_password(nueva_clave, usuario.usu_clave):
             raise HTTPException(status_code=400, detail="La nueva contraseña no puede ser igual a la anterior")
 
         # 3) actualizar
-        usuario.usu_clave = pwd_context.hash(nueva_clave)
+        usuario.usu_clave = hash_password(nueva_clave)
         db.add(usuario)
         db.commit()
 
@@ -180,61 +183,49 @@ class UsuarioServicio:
             raise HTTPException(400, "Formato no permitido. JPG, JPEG, PNG, GIF o WEBP")
 
 
-        contents = await file.read()
-        if len(contents) > max_size:
-            raise HTTPException(400, "Archivo demasiado grande. Máx 5MB")
-
-        # Eliminar imagen anterior
-        for path in self.upload_directory.glob(f"user_{usuario_id}_*"):
-            if path.is_file():
-                path.unlink()
-
-        # Guardar nueva imagen
+        await to_thread.run_sync(lambda: self.upload_directory.mkdir(parents=True, exist_ok=True))
+        # El original se copia por bloques a disco y se procesa en el pool de procesos
+        original = await guardar_upload(file, str(self.upload_directory), tuple(f".{e}" for e in allowed_exts), max_size, por_contenido=False)
         filename = f"user_{usuario_id}_{uuid.uuid4()}.{ext}"
         file_path = self.upload_directory / filename
-        with open(file_path, "wb") as f:
-            f.write(contents)
-
-        # Optimizar con Pillow
         try:
-            with Image.open(file_path) as img:
-                if img.mode in ("RGBA", "LA", "P"):
-                    img = img.convert("RGB")
-                img.thumbnail((800, 800), Image.Resampling.LANCZOS)
-                img.save(file_path, optimize=True, quality=85)
-        except Exception as e:
-            print(f"Error optimizando imagen: {e}")
-
-        # Actualizar BD
-        url = f"/uploads/profile-images/{filename}"
-        usuario = db.exec(select(Usuario).where(Usuario.usu_id == usuario_id)).first()
-        if usuario:
-            usuario.usu_imagen = url
-            db.add(usuario)
-            db.commit()
+            await ejecutar_en_proceso(optimizar_imagen, str(self.upload_directory / original.nombre), str(file_path), 800, IMAGEN_MAX_PIXELES)
+        except ValueError as e:
+            raise HTTPException(400, str(e))
+        except OSError:
+            raise HTTPException(400, "El archivo no es una imagen válida")
+        finally:
+            await to_thread.run_sync(eliminar_archivo, str(self.upload_directory), original.nombre)
+
+        # Actualizar BD y eliminar la imagen anterior registrada en el usuario
+        url = f"{PREFIJO_IMAGENES_PERFIL}{filename}"
+        anterior = await to_thread.run_sync(self._reemplazar_imagen, db, usuario_id, url)
+        if anterior and anterior.startswith(PREFIJO_IMAGENES_PERFIL):
+            await to_thread.run_sync(eliminar_archivo, str(self.upload_directory), anterior.removeprefix(PREFIJO_IMAGENES_PERFIL))
 
         return {
             "message": "Imagen subida correctamente",
             "url": url
         }
     
-    def libros_adquiridos_con_progreso(self, usuario_id: int, db: Session):
-        compras_query = (
-            select(Compra, Libro)
-            .join(Libro, Compra.com_idlibro == Libro.lib_id)
-            .where(Compra.com_idusuario == usuario_id)
-            .where(Compra.com_estado == "approved")
-        )
-        resultados = db.exec(compras_query).all()
+    def _reemplazar_imagen(self, db: Session, usuario_id: int, url: str) -> Optional[str]:
+        usuario = db.get(Usuario, usuario_id)
+        if not usuario:
+            return None
+        anterior = usuario.usu_imagen
+        usuario.usu_imagen = url
+        db.add(usuario)
+        db.commit()
+        return anterior
 
+    def libros_adquiridos_con_progreso(self, usuario_id: int, db: Session):
         libros = []
-        for compra, libro in resultados:
-            prog_query = (
-                select(ProgresoLectura)
-                .where(ProgresoLectura.pro_idusuario == usuario_id)
-                .where(ProgresoLectura.pro_idlibro == libro.lib_id)
-            )
-            progreso = db.exec(prog_query).first()
+        vistos = set()
+        for compra, libro, progreso, *_ in db.exec(consulta_biblioteca(usuario_id)).all():
+            if compra.com_id in vistos:
+                continue
+            vistos.add(compra.com_id)
+            progreso = progreso_vigente(usuario_id, libro.lib_id, progreso)
             porcentaje = None
             if progreso and progreso.pro_pagina_total:
                 porcentaje = round(100 * progreso.pro_pagina_actual / progreso.pro_pagina_total)
@@ -0,0 +1,113 @@
+# app/utils/archivo_utils.py
+import os
+import time
+import uuid
+import hashlib
+from typing import NamedTuple
+from anyio import to_thread
+from fastapi import HTTPException, UploadFile
+
+CHUNK_SIZE = 1024 * 1024
+# Los archivos en escritura llevan este sufijo hasta quedar completos
+SUFIJO_TEMPORAL = ".part"
+# Un archivo sin referencias se conserva este tiempo desde su última publicación: puede ser el
+# de otra subida del mismo contenido que todavía no guardó su libro (ver publicar_archivo)
+GRACIA_ARCHIVOS_HORAS = 24
+
+
+class ArchivoGuardado(NamedTuple):
+    nombre: str
+    sha256: str
+    tamano: int
+
+
+def _mb(tamano: int) -> str:
+    return f"{tamano / (1024 * 1024):g} MB"
+
+
+def _escribir(destino, digest, chunk: bytes):
+    digest.update(chunk)
+    destino.write(chunk)
+
+
+def _descartar(destino, ruta: str):
+    destino.close()
+    if os.path.exists(ruta):
+        os.remove(ruta)
+
+
+async def guardar_upload(file: UploadFile, carpeta: str, ext_permitida: tuple, max_size: int, por_contenido: bool = True) -> ArchivoGuardado:
+    """
+    Copia un UploadFile a `carpeta` sin bloquear el event loop: cada bloque se escribe
+    en un hilo, el SHA-256 se calcula en la misma pasada y el archivo se escribe con
+    nombre temporal y se renombra al terminar, de modo que nunca queda uno a medias.
+    El nombre final es el hash del contenido, así un mismo archivo se guarda una sola vez;
+    con `por_contenido=False` conserva un nombre único (archivos de trabajo de un solo uso).
+    """
+    ext = os.path.splitext(file.filename or "")[1].lower()
+    if ext not in ext_permitida:
+        raise HTTPException(status_code=400, detail=f"Solo se permiten archivos {ext_permitida}")
+    # Starlette ya conoce el tamaño de la parte; se rechaza antes de copiar nada
+    if file.size is not None and file.size > max_size:
+        raise HTTPException(status_code=413, detail=f"El archivo excede {_mb(max_size)}.")
+
+    nombre_base = uuid.uuid4().hex
+    ruta_temporal = os.path.join(carpeta, nombre_base + SUFIJO_TEMPORAL)
+    digest = hashlib.sha256()
+    tamano = 0
+
+    await file.seek(0)
+    destino = await to_thread.run_sync(open, ruta_temporal, "wb")
+    try:
+        while chunk := await file.read(CHUNK_SIZE):
+            tamano += len(chunk)
+            if tamano > max_size:
+                raise HTTPException(status_code=413, detail=f"El archivo excede {_mb(max_size)}.")
+            await to_thread.run_sync(_escribir, destino, digest, chunk)
+        await to_thread.run_sync(destino.close)
+    except BaseException:
+        # Sincrónico a propósito: también debe correr si la petición se cancela
+        _descartar(destino, ruta_temporal)
+        raise
+
+    sha256 = digest.hexdigest()
+    nombre = (sha256 if por_contenido else nombre_base) + ext
+    await to_thread.run_sync(publicar_archivo, ruta_temporal, os.path.join(carpeta, nombre))
+    return ArchivoGuardado(nombre, sha256, tamano)
+
+
+def publicar_archivo(ruta_temporal: str, ruta_final: str):
+    # Nombre = hash del contenido: si ya existe, es el mismo archivo y se reutiliza
+    if os.path.exists(ruta_final):
+        os.remove(ruta_temporal)
+        # Se renueva la fecha para que la limpieza no lo borre mientras se guarda la referencia
+        os.utime(ruta_final)
+    else:
+        os.replace(ruta_temporal, ruta_final)
+
+
+def etag_archivo(nombre: str, stat: os.stat_result) -> str:
+    """ETag fuerte: el hash del nombre si el archivo es direccionado por contenido."""
+    base = os.path.splitext(nombre)[0]
+    if len(base) == 64 and all(c in "0123456789abcdef" for c in base):
+        return f'"{base}"'
+    # Archivos anteriores con nombre uuid: nunca se sobrescriben, basta tamaño y fecha
+    return f'"{stat.st_size:x}-{int(stat.st_mtime):x}"'
+
+
+def eliminar_archivo(carpeta: str, nombre: str):
+    ruta = os.path.join(carpeta, nombre)
+    if os.path.isfile(ruta):
+        os.remove(ruta)
+
+
+def eliminar_si_expirado(carpeta: str, nombre: str) -> bool:
+    """Borra el archivo solo si pasó la gracia desde su última publicación; si no, queda para limpiar_archivos."""
+    ruta = os.path.join(carpeta, nombre)
+    try:
+        if os.path.getmtime(ruta) > time.time() - GRACIA_ARCHIVOS_HORAS * 3600:
+            return False
+        os.remove(ruta)
+    except FileNotFoundError:
+        return False
+    return True
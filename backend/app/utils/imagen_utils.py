@@ -0,0 +1,95 @@
+# app/utils/imagen_utils.py
+import os
+import uuid
+import warnings
+from app.utils.archivo_utils import SUFIJO_TEMPORAL
+
+# Anchos de las variantes de portada (tarjetas del catálogo, detalle y pantallas densas)
+ANCHOS_PORTADA = (160, 320, 640)
+# Formato de cada variante: extensión -> opciones de Pillow
+FORMATOS_VARIANTE = {
+    "webp": {"format": "WEBP", "quality": 80, "method": 4},
+    "jpg": {"format": "JPEG", "quality": 82, "optimize": True, "progressive": True},
+}
+
+
+def nombre_variante(nombre: str, ancho: int, ext: str) -> str:
+    return f"{os.path.splitext(nombre)[0]}_{ancho}.{ext}"
+
+
+def es_variante_de(nombre_archivo: str, bases: set) -> bool:
+    """True si `nombre_archivo` es una variante (base_ancho.ext) de alguna portada en `bases`."""
+    base, _, ancho = os.path.splitext(nombre_archivo)[0].rpartition("_")
+    return ancho.isdigit() and base in bases
+
+
+def optimizar_imagen(origen: str, destino: str, lado_maximo: int, max_pixeles: int):
+    """
+    Reduce la imagen a `lado_maximo` y la guarda en `destino` con el formato de su
+    extensión. Pensada para correr en el pool de procesos (app/core/procesos_core.py).
+    """
+    from PIL import Image, ImageOps
+
+    # Image.open solo lee el encabezado: una "bomba de descompresión" se rechaza antes de decodificarla
+    Image.MAX_IMAGE_PIXELS = max_pixeles
+    try:
+        with warnings.catch_warnings():
+            warnings.simplefilter("error", Image.DecompressionBombWarning)
+            original = Image.open(origen)
+    except (Image.DecompressionBombWarning, Image.DecompressionBombError):
+        raise ValueError(f"La imagen supera el máximo de {max_pixeles:,} píxeles")
+
+    with original:
+        imagen = ImageOps.exif_transpose(original)
+        if imagen.mode in ("RGBA", "LA", "P"):
+            imagen = imagen.convert("RGB")
+        imagen.thumbnail((lado_maximo, lado_maximo), Image.Resampling.LANCZOS)
+        formato = Image.registered_extensions()[os.path.splitext(destino)[1].lower()]
+        _guardar(imagen, destino, {"format": formato, "optimize": True, "quality": 85})
+
+
+def _guardar(imagen, ruta: str, opciones: dict):
+    ruta_temporal = os.path.join(os.path.dirname(ruta), uuid.uuid4().hex + SUFIJO_TEMPORAL)
+    try:
+        imagen.save(ruta_temporal, **opciones)
+        os.replace(ruta_temporal, ruta)
+    except BaseException:
+        if os.path.exists(ruta_temporal):
+            os.remove(ruta_temporal)
+        raise
+
+
+def generar_variantes(carpeta: str, nombre: str, anchos: tuple = ANCHOS_PORTADA) -> list[int]:
+    """
+    Genera las variantes WebP y JPEG de una portada para cada ancho (sin agrandar la
+    imagen) y retorna los anchos generados. Bloqueante: llamar desde un hilo o un worker.
+    """
+    # Import diferido: Pillow solo se necesita al procesar imágenes
+    from PIL import Image, ImageOps
+
+    with Image.open(os.path.join(carpeta, nombre)) as original:
+        imagen = ImageOps.exif_transpose(original)
+        if imagen.mode in ("RGBA", "LA", "P"):
+            # JPEG no tiene transparencia: se compone sobre blanco
+            rgba = imagen.convert("RGBA")
+            imagen = Image.new("RGB", rgba.size, "white")
+            imagen.paste(rgba, mask=rgba.getchannel("A"))
+        elif imagen.mode != "RGB":
+            imagen = imagen.convert("RGB")
+
+        generados = []
+        for ancho in sorted({min(ancho, imagen.width) for ancho in anchos}):
+            alto = max(1, round(imagen.height * ancho / imagen.width))
+            variante = imagen.resize((ancho, alto), Image.Resampling.LANCZOS)
+            for ext, opciones in FORMATOS_VARIANTE.items():
+                _guardar(variante, os.path.join(carpeta, nombre_variante(nombre, ancho, ext)), opciones)
+            generados.append(ancho)
+        return generados
+
+
+def eliminar_variantes(carpeta: str, nombre: str, anchos: list[int]):
+    for ancho in anchos:
+        for ext in FORMATOS_VARIANTE:
+            ruta = os.path.join(carpeta, nombre_variante(nombre, ancho, ext))
+            if os.path.isfile(ruta):
+                os.remove(ruta)
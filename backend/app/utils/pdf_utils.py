@@ -0,0 +1,47 @@
+# app/utils/pdf_utils.py
+import os
+import uuid
+import hashlib
+from typing import NamedTuple
+from app.utils.archivo_utils import CHUNK_SIZE, SUFIJO_TEMPORAL, publicar_archivo
+
+
+class PdfProcesado(NamedTuple):
+    nombre: str
+    paginas: int
+
+
+def _sha256(ruta: str) -> str:
+    digest = hashlib.sha256()
+    with open(ruta, "rb") as archivo:
+        while chunk := archivo.read(CHUNK_SIZE):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def linealizar_pdf(carpeta: str, nombre: str) -> PdfProcesado:
+    """
+    Reescribe el PDF linealizado ("fast web view") para que el lector pueda mostrar
+    la primera página con pocos kilobytes, y cuenta sus páginas. Como el contenido
+    cambia, el resultado se guarda con su propio hash; el original queda intacto.
+    Bloqueante: llamar desde un hilo o un worker.
+    """
+    # Import diferido: pikepdf (qpdf) solo se necesita en la ingesta
+    import pikepdf
+
+    ruta = os.path.join(carpeta, nombre)
+    with pikepdf.open(ruta) as pdf:
+        paginas = len(pdf.pages)
+        if pdf.is_linearized:
+            return PdfProcesado(nombre, paginas)
+        ruta_temporal = os.path.join(carpeta, uuid.uuid4().hex + SUFIJO_TEMPORAL)
+        try:
+            pdf.save(ruta_temporal, linearize=True)
+        except BaseException:
+            if os.path.exists(ruta_temporal):
+                os.remove(ruta_temporal)
+            raise
+
+    nuevo = _sha256(ruta_temporal) + os.path.splitext(nombre)[1].lower()
+    publicar_archivo(ruta_temporal, os.path.join(carpeta, nuevo))
+    return PdfProcesado(nuevo, paginas)
@@ -0,0 +1,98 @@
+# app/worker.py
+"""
+Worker de la cola de trabajos (tabla `trabajo`).
+
+    python -m app.worker [--concurrencia 2] [--una-vez]
+
+Se pueden correr varios procesos a la vez: cada trabajo se toma con SKIP LOCKED.
+"""
+import os
+import signal
+import asyncio
+import argparse
+from sqlmodel.ext.asyncio.session import AsyncSession
+from app.database.database import async_engine
+from app.services.servicio_trabajo import TrabajoServicio
+from app.services.servicio_libro import LibroServicio, TRABAJO_PROCESAR_PDF, TRABAJO_VARIANTES_PORTADA
+
+# Segundos entre consultas cuando la cola está vacía
+TRABAJO_INTERVALO = float(os.getenv("TRABAJO_INTERVALO", "2"))
+
+
+async def _procesar_pdf(session: AsyncSession, payload: dict):
+    await LibroServicio(session).procesar_pdf(payload["libro_id"])
+
+
+async def _variantes_portada(session: AsyncSession, payload: dict):
+    await LibroServicio(session).generar_variantes_portada(payload["libro_id"])
+
+
+MANEJADORES = {
+    TRABAJO_PROCESAR_PDF: _procesar_pdf,
+    TRABAJO_VARIANTES_PORTADA: _variantes_portada,
+}
+
+
+async def procesar_siguiente() -> bool:
+    """Procesa un trabajo; retorna False si la cola estaba vacía."""
+    async with AsyncSession(async_engine, expire_on_commit=False) as session:
+        servicio = TrabajoServicio(session)
+        trabajo = await servicio.reclamar()
+        if not trabajo:
+            return False
+        if servicio.agotado(trabajo):
+            await servicio.fallar(trabajo, trabajo.tra_error or "Sin completar al vencer el lease")
+            return True
+
+        manejador = MANEJADORES.get(trabajo.tra_tipo)
+        try:
+            if not manejador:
+                raise ValueError(f"Tipo de trabajo desconocido: {trabajo.tra_tipo}")
+            # Sesión propia: un fallo del manejador no deja la del trabajo en mal estado
+            async with AsyncSession(async_engine, expire_on_commit=False) as sesion_trabajo:
+                await manejador(sesion_trabajo, trabajo.tra_payload)
+        except Exception as e:
+            print(f"Trabajo {trabajo.tra_id} ({trabajo.tra_tipo}) falló en el intento {trabajo.tra_intentos}: {e}")
+            await servicio.fallar(trabajo, f"{type(e).__name__}: {e}")
+        else:
+            await servicio.completar(trabajo)
+        return True
+
+
+async def bucle(detener: asyncio.Event, una_vez: bool = False):
+    while not detener.is_set():
+        try:
+            if await procesar_siguiente():
+                continue
+        except Exception as e:
+            # Base de datos caída u otro error de infraestructura: se reintenta tras la espera
+            print(f"Error consultando la cola de trabajos: {e}")
+        if una_vez:
+            return
+        try:
+            await asyncio.wait_for(detener.wait(), TRABAJO_INTERVALO)
+        except asyncio.TimeoutError:
+            pass
+
+
+async def ejecutar(concurrencia: int = 1, una_vez: bool = False):
+    detener = asyncio.Event()
+    loop = asyncio.get_running_loop()
+    for senal in (signal.SIGINT, signal.SIGTERM):
+        loop.add_signal_handler(senal, detener.set)
+    try:
+        await asyncio.gather(*(bucle(detener, una_vez) for _ in range(concurrencia)))
+    finally:
+        await async_engine.dispose()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Procesa la cola de trabajos en segundo plano.")
+    parser.add_argument("--concurrencia", type=int, default=int(os.getenv("TRABAJO_CONCURRENCIA", "1")))
+    parser.add_argument("--una-vez", action="store_true", help="Vacía la cola y termina")
+    args = parser.parse_args()
+    asyncio.run(ejecutar(args.concurrencia, args.una_vez))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,86 @@
+# migraciones/env.py
+import re
+from logging.config import fileConfig
+
+from alembic import context
+from sqlalchemy import create_engine, pool
+from sqlmodel import SQLModel
+
+from app.database.database import DATABASE_URL
+
+# Tablas que maneja la aplicación (las mismas que registraba create_all)
+from app.models.usuario.modelo_rol import Rol  # noqa: F401
+from app.models.usuario.modelo_usuario import Usuario  # noqa: F401
+from app.models.libro.modelo_autor import Autor  # noqa: F401
+from app.models.libro.modelo_categoria import Categoria  # noqa: F401
+from app.models.libro.modelo_editorial import Editorial  # noqa: F401
+from app.models.libro.modelo_libro import Libro  # noqa: F401
+from app.models.compra.modelo_compra import Compra  # noqa: F401
+from app.models.texto.modelo_texto import Texto  # noqa: F401
+from app.models.libro.progreso.modelo_progreso import ProgresoLectura  # noqa: F401
+from app.models.libro.lectura.modelo_lectura import LecturaSesion, LecturaResumen, LecturaResumenArchivado, LecturaArchivo  # noqa: F401
+from app.models.trabajo.modelo_trabajo import Trabajo  # noqa: F401
+from app.models.contador.modelo_contador import Contador  # noqa: F401
+
+config = context.config
+
+if config.config_file_name is not None:
+    fileConfig(config.config_file_name)
+
+target_metadata = SQLModel.metadata
+
+# Objetos creados con SQL en las migraciones que no tienen equivalente en los modelos
+# (búsqueda de texto completo y trigramas); autogenerate no debe proponer borrarlos
+OBJETOS_SIN_MODELO = {"lib_busqueda", "ix_libro_busqueda", "ix_libro_titulo_trgm", "ix_autor_nombre_trgm"}
+
+
+# Particiones mensuales de lectura_sesion (las crea crear_particiones, no los modelos)
+PARTICION = re.compile(r"lectura_sesion_\d{4}_\d{2}")
+
+
+def incluir_objeto(objeto, nombre, tipo, reflejado, comparado_con):
+    if tipo == "table" and reflejado and PARTICION.fullmatch(nombre):
+        return False
+    return not (reflejado and comparado_con is None and nombre in OBJETOS_SIN_MODELO)
+
+
+def renderizar(tipo, objeto, autogen_context):
+    # Las columnas str de SQLModel son AutoString: el import va solo en las migraciones que lo usan
+    if tipo == "type" and type(objeto).__module__.startswith("sqlmodel"):
+        autogen_context.imports.add("import sqlmodel")
+    return False
+
+
+def run_migrations_offline() -> None:
+    context.configure(
+        url=DATABASE_URL,
+        target_metadata=target_metadata,
+        include_object=incluir_objeto,
+        render_item=renderizar,
+        literal_binds=True,
+        dialect_opts={"paramstyle": "named"},
+    )
+
+    with context.begin_transaction():
+        context.run_migrations()
+
+
+def run_migrations_online() -> None:
+    connectable = create_engine(DATABASE_URL, poolclass=pool.NullPool)
+
+    with connectable.connect() as connection:
+        context.configure(
+            connection=connection,
+            target_metadata=target_metadata,
+            include_object=incluir_objeto,
+            render_item=renderizar,
+        )
+
+        with context.begin_transaction():
+            context.run_migrations()
+
+
+if context.is_offline_mode():
+    run_migrations_offline()
+else:
+    run_migrations_online()
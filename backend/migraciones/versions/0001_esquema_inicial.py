@@ -0,0 +1,223 @@
+"""esquema inicial
+
+Línea base del esquema. Las bases existentes (creadas con create_all y el DDL de
+app/database/esquema.py) la adoptan sin cambios: solo se crea lo que falte.
+
+Revision ID: 0001
+Revises:
+Create Date: 2026-10-18 12:38:00.468386
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+import sqlmodel
+from sqlalchemy.dialects import postgresql
+
+# revision identifiers, used by Alembic.
+revision: str = '0001'
+down_revision: Union[str, Sequence[str], None] = None
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# Búsqueda de texto completo: español con stemming e insensible a tildes
+DOCUMENTO_BUSQUEDA = """
+    setweight(to_tsvector('es_unaccent', coalesce(libro.lib_titulo, '')), 'A')
+    || setweight(to_tsvector('es_unaccent', coalesce((SELECT aut_nombre FROM autor WHERE aut_id = libro.lib_idautor), '')), 'B')
+    || setweight(to_tsvector('es_unaccent', coalesce((SELECT cat_nombre FROM categoria WHERE cat_id = libro.lib_idcategoria), '')), 'C')
+    || setweight(to_tsvector('es_unaccent', coalesce(libro.lib_descripcion, '')), 'D')
+"""
+
+
+def _crear_tabla(nombre, *elementos):
+    if not sa.inspect(op.get_bind()).has_table(nombre):
+        op.create_table(nombre, *elementos)
+
+
+def upgrade() -> None:
+    _crear_tabla('autor',
+    sa.Column('aut_id', sa.Integer(), nullable=False),
+    sa.Column('aut_nombre', sqlmodel.sql.sqltypes.AutoString(length=100), nullable=False),
+    sa.Column('aut_biografia', sqlmodel.sql.sqltypes.AutoString(), nullable=True),
+    sa.PrimaryKeyConstraint('aut_id')
+    )
+    _crear_tabla('categoria',
+    sa.Column('cat_id', sa.Integer(), nullable=False),
+    sa.Column('cat_nombre', sqlmodel.sql.sqltypes.AutoString(length=50), nullable=False),
+    sa.Column('cat_descripcion', sqlmodel.sql.sqltypes.AutoString(), nullable=True),
+    sa.PrimaryKeyConstraint('cat_id'),
+    sa.UniqueConstraint('cat_nombre')
+    )
+    _crear_tabla('editorial',
+    sa.Column('edi_id', sa.Integer(), nullable=False),
+    sa.Column('edi_nombre', sqlmodel.sql.sqltypes.AutoString(length=100), nullable=False),
+    sa.Column('edi_biografia', sqlmodel.sql.sqltypes.AutoString(), nullable=True),
+    sa.PrimaryKeyConstraint('edi_id')
+    )
+    _crear_tabla('rol',
+    sa.Column('rol_id', sa.Integer(), nullable=False),
+    sa.Column('rol_nombre', sqlmodel.sql.sqltypes.AutoString(length=20), nullable=False),
+    sa.PrimaryKeyConstraint('rol_id')
+    )
+    _crear_tabla('trabajo',
+    sa.Column('tra_id', sa.Integer(), nullable=False),
+    sa.Column('tra_tipo', sqlmodel.sql.sqltypes.AutoString(length=50), nullable=False),
+    sa.Column('tra_payload', postgresql.JSONB(astext_type=sa.Text()), nullable=False),
+    sa.Column('tra_estado', sqlmodel.sql.sqltypes.AutoString(length=20), nullable=False),
+    sa.Column('tra_intentos', sa.Integer(), nullable=False),
+    sa.Column('tra_max_intentos', sa.Integer(), nullable=False),
+    sa.Column('tra_disponible', sa.DateTime(), nullable=False),
+    sa.Column('tra_error', sqlmodel.sql.sqltypes.AutoString(), nullable=True),
+    sa.Column('tra_creado', sa.DateTime(), nullable=False),
+    sa.Column('tra_actualizado', sa.DateTime(), nullable=False),
+    sa.PrimaryKeyConstraint('tra_id')
+    )
+    op.create_index('ix_trabajo_cola', 'trabajo', ['tra_estado', 'tra_disponible'], unique=False, if_not_exists=True)
+    _crear_tabla('libro',
+    sa.Column('lib_id', sa.Integer(), nullable=False),
+    sa.Column('lib_titulo', sqlmodel.sql.sqltypes.AutoString(length=150), nullable=False),
+    sa.Column('lib_descripcion', sqlmodel.sql.sqltypes.AutoString(), nullable=True),
+    sa.Column('lib_fecha', sa.Date(), nullable=False),
+    sa.Column('lib_precio', sa.Integer(), nullable=True),
+    sa.Column('lib_url', sqlmodel.sql.sqltypes.AutoString(length=255), nullable=True),
+    sa.Column('lib_ideditorial', sa.Integer(), nullable=True),
+    sa.Column('lib_estado', sa.Boolean(), nullable=False),
+    sa.Column('lib_portada', sqlmodel.sql.sqltypes.AutoString(length=100), nullable=True),
+    sa.Column('lib_idautor', sa.Integer(), nullable=True),
+    sa.Column('lib_idcategoria', sa.Integer(), nullable=True),
+    sa.Column('lib_descuento', sa.Integer(), nullable=True),
+    sa.Column('lib_total_paginas', sa.Integer(), nullable=True),
+    sa.Column('lib_portada_anchos', postgresql.ARRAY(sa.Integer()), nullable=True),
+    sa.ForeignKeyConstraint(['lib_idautor'], ['autor.aut_id'], ),
+    sa.ForeignKeyConstraint(['lib_idcategoria'], ['categoria.cat_id'], ),
+    sa.ForeignKeyConstraint(['lib_ideditorial'], ['editorial.edi_id'], ),
+    sa.PrimaryKeyConstraint('lib_id')
+    )
+    _crear_tabla('usuario',
+    sa.Column('usu_id', sa.Integer(), nullable=False),
+    sa.Column('usu_usuario', sqlmodel.sql.sqltypes.AutoString(length=50), nullable=False),
+    sa.Column('usu_correo', sqlmodel.sql.sqltypes.AutoString(length=100), nullable=False),
+    sa.Column('usu_clave', sqlmodel.sql.sqltypes.AutoString(), nullable=False),
+    sa.Column('usu_verificado', sa.Boolean(), nullable=False),
+    sa.Column('usu_fecharegistro', sa.Date(), nullable=False),
+    sa.Column('usu_idrol', sa.Integer(), nullable=True),
+    sa.Column('usu_nombre', sqlmodel.sql.sqltypes.AutoString(length=30), nullable=True),
+    sa.Column('usu_apellido', sqlmodel.sql.sqltypes.AutoString(length=30), nullable=False),
+    sa.Column('usu_ciudad', sqlmodel.sql.sqltypes.AutoString(length=30), nullable=True),
+    sa.Column('usu_pais', sqlmodel.sql.sqltypes.AutoString(length=30), nullable=True),
+    sa.Column('usu_imagen', sqlmodel.sql.sqltypes.AutoString(length=100), nullable=True),
+    sa.ForeignKeyConstraint(['usu_idrol'], ['rol.rol_id'], ),
+    sa.PrimaryKeyConstraint('usu_id'),
+    sa.UniqueConstraint('usu_correo')
+    )
+    _crear_tabla('compra',
+    sa.Column('com_id', sa.Integer(), nullable=False),
+    sa.Column('com_idusuario', sa.Integer(), nullable=True),
+    sa.Column('com_idlibro', sa.Integer(), nullable=True),
+    sa.Column('com_fecha', sa.DateTime(), nullable=False),
+    sa.Column('com_estado', sqlmodel.sql.sqltypes.AutoString(), nullable=True),
+    sa.Column('com_referencia', sqlmodel.sql.sqltypes.AutoString(), nullable=True),
+    sa.ForeignKeyConstraint(['com_idlibro'], ['libro.lib_id'], ),
+    sa.ForeignKeyConstraint(['com_idusuario'], ['usuario.usu_id'], ),
+    sa.PrimaryKeyConstraint('com_id')
+    )
+    op.create_index(op.f('ix_compra_com_referencia'), 'compra', ['com_referencia'], unique=False, if_not_exists=True)
+    _crear_tabla('lectura_sesion',
+    sa.Column('ls_id', sa.Integer(), nullable=False),
+    sa.Column('ls_idusuario', sa.Integer(), nullable=False),
+    sa.Column('ls_idlibro', sa.Integer(), nullable=False),
+    sa.Column('ls_fecha_inicial', sa.DateTime(), nullable=False),
+    sa.Column('ls_fecha_final', sa.DateTime(), nullable=True),
+    sa.ForeignKeyConstraint(['ls_idlibro'], ['libro.lib_id'], ),
+    sa.ForeignKeyConstraint(['ls_idusuario'], ['usuario.usu_id'], ),
+    sa.PrimaryKeyConstraint('ls_id')
+    )
+    _crear_tabla('progreso_lectura',
+    sa.Column('pro_id', sa.Integer(), nullable=False),
+    sa.Column('pro_idusuario', sa.Integer(), nullable=True),
+    sa.Column('pro_idlibro', sa.Integer(), nullable=True),
+    sa.Column('pro_pagina_actual', sa.Integer(), nullable=True),
+    sa.Column('pro_pagina_total', sa.Integer(), nullable=True),
+    sa.ForeignKeyConstraint(['pro_idlibro'], ['libro.lib_id'], ),
+    sa.ForeignKeyConstraint(['pro_idusuario'], ['usuario.usu_id'], ),
+    sa.PrimaryKeyConstraint('pro_id')
+    )
+    _crear_tabla('texto',
+    sa.Column('txt_id', sa.Integer(), nullable=False),
+    sa.Column('txt_idlibro', sa.Integer(), nullable=False),
+    sa.Column('txt_idusuario', sa.Integer(), nullable=False),
+    sa.Column('txt_pagina', sa.Integer(), nullable=False),
+    sa.Column('txt_x', sa.Float(), nullable=False),
+    sa.Column('txt_y', sa.Float(), nullable=False),
+    sa.Column('txt_texto', sqlmodel.sql.sqltypes.AutoString(), nullable=False),
+    sa.Column('txt_ancho', sa.Integer(), nullable=False),
+    sa.Column('txt_alto', sa.Integer(), nullable=False),
+    sa.Column('txt_dimension', sa.Integer(), nullable=False),
+    sa.Column('txt_creado', sa.DateTime(), nullable=True),
+    sa.Column('txt_actualizado', sa.DateTime(), nullable=True),
+    sa.ForeignKeyConstraint(['txt_idlibro'], ['libro.lib_id'], ),
+    sa.ForeignKeyConstraint(['txt_idusuario'], ['usuario.usu_id'], ),
+    sa.PrimaryKeyConstraint('txt_id')
+    )
+    op.create_index(op.f('ix_texto_txt_idlibro'), 'texto', ['txt_idlibro'], unique=False, if_not_exists=True)
+    op.create_index(op.f('ix_texto_txt_idusuario'), 'texto', ['txt_idusuario'], unique=False, if_not_exists=True)
+
+    # Columnas agregadas después de la primera versión (bases creadas antes)
+    op.execute("ALTER TABLE libro ADD COLUMN IF NOT EXISTS lib_total_paginas integer")
+    op.execute("ALTER TABLE libro ADD COLUMN IF NOT EXISTS lib_portada_anchos integer[]")
+
+    # Un solo progreso por (usuario, libro), el más avanzado, antes de exigir la unicidad
+    op.execute("""
+        DELETE FROM progreso_lectura p
+        USING progreso_lectura q
+        WHERE p.pro_idusuario = q.pro_idusuario
+          AND p.pro_idlibro = q.pro_idlibro
+          AND (coalesce(p.pro_pagina_actual, -1), p.pro_id) < (coalesce(q.pro_pagina_actual, -1), q.pro_id)
+    """)
+    op.create_index('uq_progreso_usuario_libro', 'progreso_lectura', ['pro_idusuario', 'pro_idlibro'], unique=True, if_not_exists=True)
+
+    op.execute("CREATE EXTENSION IF NOT EXISTS unaccent")
+    op.execute("""
+        DO $$
+        BEGIN
+            IF NOT EXISTS (SELECT 1 FROM pg_ts_config WHERE cfgname = 'es_unaccent') THEN
+                CREATE TEXT SEARCH CONFIGURATION es_unaccent (COPY = spanish);
+                ALTER TEXT SEARCH CONFIGURATION es_unaccent
+                    ALTER MAPPING FOR hword, hword_part, word WITH unaccent, spanish_stem;
+            END IF;
+        END
+        $$
+    """)
+    op.execute("ALTER TABLE libro ADD COLUMN IF NOT EXISTS lib_busqueda tsvector")
+    op.execute("CREATE INDEX IF NOT EXISTS ix_libro_busqueda ON libro USING GIN (lib_busqueda)")
+    op.execute(f"UPDATE libro SET lib_busqueda = {DOCUMENTO_BUSQUEDA} WHERE lib_busqueda IS NULL")
+
+    # Trigramas para el autocompletado tolerante a errores de escritura
+    op.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+    op.execute("CREATE INDEX IF NOT EXISTS ix_libro_titulo_trgm ON libro USING GIN (lower(lib_titulo) gin_trgm_ops)")
+    op.execute("CREATE INDEX IF NOT EXISTS ix_autor_nombre_trgm ON autor USING GIN (lower(aut_nombre) gin_trgm_ops)")
+
+
+def downgrade() -> None:
+    op.execute("DROP INDEX IF EXISTS ix_autor_nombre_trgm")
+    op.execute("DROP INDEX IF EXISTS ix_libro_titulo_trgm")
+    op.execute("DROP INDEX IF EXISTS ix_libro_busqueda")
+    op.execute("ALTER TABLE libro DROP COLUMN IF EXISTS lib_busqueda")
+    op.execute("DROP TEXT SEARCH CONFIGURATION IF EXISTS es_unaccent")
+    op.drop_index(op.f('ix_texto_txt_idusuario'), table_name='texto')
+    op.drop_index(op.f('ix_texto_txt_idlibro'), table_name='texto')
+    op.drop_table('texto')
+    op.drop_index('uq_progreso_usuario_libro', table_name='progreso_lectura')
+    op.drop_table('progreso_lectura')
+    op.drop_table('lectura_sesion')
+    op.drop_index(op.f('ix_compra_com_referencia'), table_name='compra')
+    op.drop_table('compra')
+    op.drop_table('usuario')
+    op.drop_table('libro')
+    op.drop_index('ix_trabajo_cola', table_name='trabajo')
+    op.drop_table('trabajo')
+    op.drop_table('rol')
+    op.drop_table('editorial')
+    op.drop_table('categoria')
+    op.drop_table('autor')
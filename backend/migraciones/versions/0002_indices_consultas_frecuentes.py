@@ -0,0 +1,50 @@
+"""indices consultas frecuentes
+
+Índices compuestos y parciales para la verificación de compras, el panel de
+administración y las sesiones de lectura. Se crean con CONCURRENTLY para no
+bloquear escrituras en tablas ya pobladas (ver app/comandos/verificar_planes.py).
+
+Revision ID: 0002
+Revises: 0001
+Create Date: 2026-10-18 12:38:47.641973
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0002'
+down_revision: Union[str, Sequence[str], None] = '0001'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def _crear_indice(nombre, tabla, columnas, **kwargs):
+    # Un CREATE INDEX CONCURRENTLY interrumpido deja el índice inválido; IF NOT EXISTS no lo repararía
+    invalido = op.get_bind().execute(
+        sa.text("SELECT 1 FROM pg_index WHERE indexrelid = to_regclass(:nombre) AND NOT indisvalid"),
+        {"nombre": nombre},
+    ).first()
+    if invalido:
+        op.drop_index(nombre, table_name=tabla, postgresql_concurrently=True)
+    op.create_index(nombre, tabla, columnas, postgresql_concurrently=True, if_not_exists=True, **kwargs)
+
+
+def upgrade() -> None:
+    # CONCURRENTLY no puede correr dentro de una transacción
+    with op.get_context().autocommit_block():
+        _crear_indice('ix_compra_usuario_libro_estado', 'compra', ['com_idusuario', 'com_idlibro', 'com_estado'])
+        _crear_indice('ix_compra_aprobada_fecha', 'compra', ['com_fecha'], postgresql_where=sa.text("com_estado = 'approved'"))
+        _crear_indice('ix_lectura_usuario_libro_final', 'lectura_sesion', ['ls_idusuario', 'ls_idlibro', 'ls_fecha_final'])
+        _crear_indice('ix_lectura_abierta', 'lectura_sesion', ['ls_idusuario', 'ls_idlibro'], postgresql_where=sa.text('ls_fecha_final IS NULL'))
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.drop_index('ix_lectura_abierta', table_name='lectura_sesion', postgresql_concurrently=True, if_exists=True)
+        op.drop_index('ix_lectura_usuario_libro_final', table_name='lectura_sesion', postgresql_concurrently=True, if_exists=True)
+        op.drop_index('ix_compra_aprobada_fecha', table_name='compra', postgresql_concurrently=True, if_exists=True)
+        op.drop_index('ix_compra_usuario_libro_estado', table_name='compra', postgresql_concurrently=True, if_exists=True)
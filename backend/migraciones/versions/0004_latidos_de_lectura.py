@@ -0,0 +1,37 @@
+"""latidos de lectura
+
+Columna ls_ultima_actividad (último latido del lector) e índice parcial de las
+sesiones abiertas por actividad, para cerrar las inactivas sin recorrer la tabla.
+
+Revision ID: 0004
+Revises: 0003
+Create Date: 2026-10-18 12:45:21.030539
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0004'
+down_revision: Union[str, Sequence[str], None] = '0003'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column('lectura_sesion', sa.Column('ls_ultima_actividad', sa.DateTime(), nullable=True))
+    # Las abiertas sin latidos se toman como activas desde su inicio: el barrido las cierra sin
+    # sumarles el tiempo que estuvieron olvidadas
+    op.execute("UPDATE lectura_sesion SET ls_ultima_actividad = ls_fecha_inicial WHERE ls_fecha_final IS NULL")
+    with op.get_context().autocommit_block():
+        op.create_index('ix_lectura_abierta_actividad', 'lectura_sesion', ['ls_ultima_actividad'],
+                        postgresql_where=sa.text('ls_fecha_final IS NULL'), postgresql_concurrently=True, if_not_exists=True)
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.drop_index('ix_lectura_abierta_actividad', table_name='lectura_sesion', postgresql_concurrently=True, if_exists=True)
+    op.drop_column('lectura_sesion', 'ls_ultima_actividad')
@@ -0,0 +1,172 @@
+"""particiones de lectura
+
+Convierte lectura_sesion en una tabla particionada por mes de ls_fecha_inicial
+(lectura_sesion_AAAA_MM, con la clave primaria (ls_id, ls_fecha_inicial)) y copia
+las filas existentes. Agrega lectura_archivo y lectura_resumen_archivado para
+app/comandos/archivar_lecturas.py, y la tabla contador que mantienen triggers
+para el panel de administración, en lugar de COUNT(*).
+
+La copia bloquea lectura_sesion mientras dura: correrla antes de levantar la API.
+
+Revision ID: 0005
+Revises: 0004
+Create Date: 2026-10-18 13:05:12.418305
+
+"""
+from datetime import date
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+import sqlmodel
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0005'
+down_revision: Union[str, Sequence[str], None] = '0004'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# Meses creados por delante del actual; después los crea la API (crear_particiones)
+PARTICIONES_ADELANTE = 3
+
+COLUMNAS_SESION = "ls_id, ls_idusuario, ls_idlibro, ls_fecha_inicial, ls_fecha_final, ls_ultima_actividad"
+
+
+def _sumar_meses(mes, cantidad):
+    indice = mes.year * 12 + mes.month - 1 + cantidad
+    return date(indice // 12, indice % 12 + 1, 1)
+
+
+def _indices_sesion():
+    op.create_index('ix_lectura_usuario_libro_final', 'lectura_sesion', ['ls_idusuario', 'ls_idlibro', 'ls_fecha_final'])
+    op.create_index('ix_lectura_abierta', 'lectura_sesion', ['ls_idusuario', 'ls_idlibro'], postgresql_where=sa.text('ls_fecha_final IS NULL'))
+    op.create_index('ix_lectura_abierta_actividad', 'lectura_sesion', ['ls_ultima_actividad'], postgresql_where=sa.text('ls_fecha_final IS NULL'))
+
+
+def _reemplazar_tabla_sesion(particionada):
+    # La secuencia de ls_id pasa a la tabla nueva; las restricciones e índices de la vieja se
+    # renombran o borran para liberar sus nombres
+    op.execute("ALTER SEQUENCE lectura_sesion_ls_id_seq OWNED BY NONE")
+    op.rename_table('lectura_sesion', 'lectura_sesion_anterior')
+    op.execute("ALTER TABLE lectura_sesion_anterior RENAME CONSTRAINT lectura_sesion_pkey TO lectura_sesion_anterior_pkey")
+    for indice in ('ix_lectura_usuario_libro_final', 'ix_lectura_abierta', 'ix_lectura_abierta_actividad'):
+        op.drop_index(indice, table_name='lectura_sesion_anterior', if_exists=True)
+
+    op.create_table('lectura_sesion',
+    sa.Column('ls_id', sa.Integer(), server_default=sa.text("nextval('lectura_sesion_ls_id_seq')"), nullable=False),
+    sa.Column('ls_idusuario', sa.Integer(), nullable=False),
+    sa.Column('ls_idlibro', sa.Integer(), nullable=False),
+    sa.Column('ls_fecha_inicial', sa.DateTime(), nullable=False),
+    sa.Column('ls_fecha_final', sa.DateTime(), nullable=True),
+    sa.Column('ls_ultima_actividad', sa.DateTime(), nullable=True),
+    sa.ForeignKeyConstraint(['ls_idlibro'], ['libro.lib_id'], ),
+    sa.ForeignKeyConstraint(['ls_idusuario'], ['usuario.usu_id'], ),
+    sa.PrimaryKeyConstraint('ls_id', 'ls_fecha_inicial') if particionada else sa.PrimaryKeyConstraint('ls_id'),
+    **({'postgresql_partition_by': 'RANGE (ls_fecha_inicial)'} if particionada else {})
+    )
+
+    if particionada:
+        bind = op.get_bind()
+        hoy = date.today()
+        mes_actual = date(hoy.year, hoy.month, 1)
+        primera = bind.execute(sa.text("SELECT min(ls_fecha_inicial) FROM lectura_sesion_anterior")).scalar()
+        mes = date(primera.year, primera.month, 1) if primera and primera.date() < mes_actual else mes_actual
+        while mes <= _sumar_meses(mes_actual, PARTICIONES_ADELANTE):
+            op.execute(
+                f"CREATE TABLE lectura_sesion_{mes:%Y_%m} PARTITION OF lectura_sesion "
+                f"FOR VALUES FROM ('{mes}') TO ('{_sumar_meses(mes, 1)}')"
+            )
+            mes = _sumar_meses(mes, 1)
+        # Las sesiones se cuentan al insertarse; las particiones heredan el trigger
+        op.execute(
+            "CREATE TRIGGER tr_contar_sesiones AFTER INSERT ON lectura_sesion "
+            "FOR EACH ROW EXECUTE FUNCTION contar_filas('lectura_sesiones')"
+        )
+
+    op.execute(f"INSERT INTO lectura_sesion ({COLUMNAS_SESION}) SELECT {COLUMNAS_SESION} FROM lectura_sesion_anterior")
+    op.drop_table('lectura_sesion_anterior')
+    op.execute("ALTER SEQUENCE lectura_sesion_ls_id_seq OWNED BY lectura_sesion.ls_id")
+    _indices_sesion()
+
+
+def upgrade() -> None:
+    op.create_table('contador',
+    sa.Column('con_nombre', sqlmodel.sql.sqltypes.AutoString(length=50), nullable=False),
+    sa.Column('con_valor', sa.BigInteger(), server_default='0', nullable=False),
+    sa.PrimaryKeyConstraint('con_nombre')
+    )
+    op.execute("""
+        CREATE FUNCTION contar_filas() RETURNS trigger AS $$
+        BEGIN
+            UPDATE contador SET con_valor = con_valor + CASE WHEN TG_OP = 'DELETE' THEN -1 ELSE 1 END
+            WHERE con_nombre = TG_ARGV[0];
+            RETURN NULL;
+        END
+        $$ LANGUAGE plpgsql
+    """)
+    op.execute("""
+        CREATE FUNCTION contar_verificados() RETURNS trigger AS $$
+        BEGIN
+            UPDATE contador SET con_valor = con_valor
+                + CASE WHEN TG_OP <> 'DELETE' AND NEW.usu_verificado IS TRUE THEN 1 ELSE 0 END
+                - CASE WHEN TG_OP <> 'INSERT' AND OLD.usu_verificado IS TRUE THEN 1 ELSE 0 END
+            WHERE con_nombre = 'usuarios_verificados';
+            RETURN NULL;
+        END
+        $$ LANGUAGE plpgsql
+    """)
+
+    _reemplazar_tabla_sesion(particionada=True)
+
+    # Valores iniciales con las tablas bloqueadas, para que ninguna fila quede sin contar o contada dos veces
+    op.execute("LOCK TABLE usuario, libro IN SHARE MODE")
+    op.execute("CREATE TRIGGER tr_contar_usuarios AFTER INSERT OR DELETE ON usuario FOR EACH ROW EXECUTE FUNCTION contar_filas('usuarios')")
+    op.execute("CREATE TRIGGER tr_contar_verificados AFTER INSERT OR DELETE OR UPDATE OF usu_verificado ON usuario FOR EACH ROW EXECUTE FUNCTION contar_verificados()")
+    op.execute("CREATE TRIGGER tr_contar_libros AFTER INSERT OR DELETE ON libro FOR EACH ROW EXECUTE FUNCTION contar_filas('libros')")
+    op.execute("""
+        INSERT INTO contador (con_nombre, con_valor) VALUES
+            ('usuarios', (SELECT count(*) FROM usuario)),
+            ('usuarios_verificados', (SELECT count(*) FROM usuario WHERE usu_verificado IS TRUE)),
+            ('libros', (SELECT count(*) FROM libro)),
+            ('lectura_sesiones', (SELECT count(*) FROM lectura_sesion))
+    """)
+
+    op.create_table('lectura_archivo',
+    sa.Column('la_id', sa.Integer(), nullable=False),
+    sa.Column('la_particion', sqlmodel.sql.sqltypes.AutoString(length=63), nullable=False),
+    sa.Column('la_desde', sa.DateTime(), nullable=False),
+    sa.Column('la_hasta', sa.DateTime(), nullable=False),
+    sa.Column('la_filas', sa.Integer(), nullable=False),
+    sa.Column('la_archivo', sqlmodel.sql.sqltypes.AutoString(length=255), nullable=False),
+    sa.Column('la_fecha', sa.DateTime(), nullable=False),
+    sa.PrimaryKeyConstraint('la_id'),
+    sa.UniqueConstraint('la_particion')
+    )
+    op.create_table('lectura_resumen_archivado',
+    sa.Column('lr_idusuario', sa.Integer(), nullable=False),
+    sa.Column('lr_idlibro', sa.Integer(), nullable=False),
+    sa.Column('lr_sesiones', sa.Integer(), nullable=False),
+    sa.Column('lr_segundos', sa.Float(), nullable=False),
+    sa.Column('lr_minutos', sa.Integer(), nullable=False),
+    sa.Column('lr_suma_dias', sa.Integer(), nullable=False),
+    sa.Column('lr_primera_sesion', sa.DateTime(), nullable=True),
+    sa.Column('lr_ultima_sesion', sa.DateTime(), nullable=True),
+    sa.Column('lr_ultimo_final', sa.DateTime(), nullable=True),
+    sa.ForeignKeyConstraint(['lr_idlibro'], ['libro.lib_id'], ),
+    sa.ForeignKeyConstraint(['lr_idusuario'], ['usuario.usu_id'], ),
+    sa.PrimaryKeyConstraint('lr_idusuario', 'lr_idlibro')
+    )
+
+
+def downgrade() -> None:
+    # Las sesiones ya archivadas no vuelven: quedan solo en los CSV de lectura_archivo
+    op.drop_table('lectura_resumen_archivado')
+    op.drop_table('lectura_archivo')
+    op.execute("DROP TRIGGER tr_contar_libros ON libro")
+    op.execute("DROP TRIGGER tr_contar_verificados ON usuario")
+    op.execute("DROP TRIGGER tr_contar_usuarios ON usuario")
+    _reemplazar_tabla_sesion(particionada=False)
+    op.execute("DROP FUNCTION contar_verificados()")
+    op.execute("DROP FUNCTION contar_filas()")
+    op.drop_table('contador')
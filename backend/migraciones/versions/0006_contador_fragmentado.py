@@ -0,0 +1,66 @@
+"""contador fragmentado
+
+Las sesiones de lectura se cuentan en FRAGMENTOS filas de contador (con_fragmento =
+ls_id % FRAGMENTOS) en lugar de una sola: con una fila, todos los inicios de sesión
+concurrentes esperaban el mismo bloqueo. Los demás contadores siguen en el fragmento 0;
+el total es la suma de los fragmentos de cada nombre.
+
+Revision ID: 0006
+Revises: 0005
+Create Date: 2026-10-18 16:20:44.702913
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0006'
+down_revision: Union[str, Sequence[str], None] = '0005'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+FRAGMENTOS = 16
+
+
+def upgrade() -> None:
+    op.add_column('contador', sa.Column('con_fragmento', sa.SmallInteger(), server_default='0', nullable=False))
+    op.drop_constraint('contador_pkey', 'contador', type_='primary')
+    op.create_primary_key('contador_pkey', 'contador', ['con_nombre', 'con_fragmento'])
+    op.execute(
+        "INSERT INTO contador (con_nombre, con_fragmento, con_valor) "
+        f"SELECT 'lectura_sesiones', f, 0 FROM generate_series(1, {FRAGMENTOS - 1}) f"
+    )
+    op.execute(f"""
+        CREATE FUNCTION contar_sesiones() RETURNS trigger AS $$
+        BEGIN
+            UPDATE contador SET con_valor = con_valor + 1
+            WHERE con_nombre = 'lectura_sesiones' AND con_fragmento = NEW.ls_id % {FRAGMENTOS};
+            RETURN NULL;
+        END
+        $$ LANGUAGE plpgsql
+    """)
+    op.execute("DROP TRIGGER tr_contar_sesiones ON lectura_sesion")
+    op.execute(
+        "CREATE TRIGGER tr_contar_sesiones AFTER INSERT ON lectura_sesion "
+        "FOR EACH ROW EXECUTE FUNCTION contar_sesiones()"
+    )
+
+
+def downgrade() -> None:
+    op.execute("DROP TRIGGER tr_contar_sesiones ON lectura_sesion")
+    op.execute(
+        "CREATE TRIGGER tr_contar_sesiones AFTER INSERT ON lectura_sesion "
+        "FOR EACH ROW EXECUTE FUNCTION contar_filas('lectura_sesiones')"
+    )
+    op.execute("DROP FUNCTION contar_sesiones()")
+    op.execute("""
+        UPDATE contador SET con_valor = (SELECT sum(con_valor) FROM contador WHERE con_nombre = 'lectura_sesiones')
+        WHERE con_nombre = 'lectura_sesiones' AND con_fragmento = 0
+    """)
+    op.execute("DELETE FROM contador WHERE con_fragmento <> 0")
+    op.drop_constraint('contador_pkey', 'contador', type_='primary')
+    op.create_primary_key('contador_pkey', 'contador', ['con_nombre'])
+    op.drop_column('contador', 'con_fragmento')
@@ -0,0 +1,23 @@
+"""
+Presupuesto de arranque de app/comandos/perfil_arranque.py: falla si una dependencia
+pesada vuelve a importarse con app.main o si la primera petición tarda más de
+PRESUPUESTO_ARRANQUE_MS. Importar app.main necesita DATABASE_URL.
+"""
+import os
+import pytest
+
+if not os.getenv("DATABASE_URL"):
+    pytest.skip("DATABASE_URL no está definida", allow_module_level=True)
+
+from app.comandos.perfil_arranque import (
+    PRESUPUESTO_ARRANQUE_MS, modulos_importados, dependencias_cargadas, medir_primera_peticion,
+)
+
+
+def test_no_importa_dependencias_perezosas():
+    assert dependencias_cargadas(modulos_importados()) == []
+
+
+def test_primera_peticion_dentro_del_presupuesto():
+    _, primera_ms = medir_primera_peticion()
+    assert primera_ms <= PRESUPUESTO_ARRANQUE_MS
@@ -0,0 +1,64 @@
+"""
+Las consultas de app/comandos/verificar_planes.py usan sus índices. Necesita una base
+migrada (alembic upgrade head) en DATABASE_URL; los datos se cargan en una transacción
+que se descarta al terminar.
+"""
+import os
+import pytest
+
+if not os.getenv("DATABASE_URL"):
+    pytest.skip("DATABASE_URL no está definida", allow_module_level=True)
+
+from sqlalchemy import text
+from sqlmodel import Session
+from app.database.database import engine
+from app.comandos.verificar_planes import consultas, preparar, indices_usados
+
+USUARIOS = 200
+LIBROS = 20
+LIBROS_POR_USUARIO = 5
+
+# Cada usuario lee LIBROS_POR_USUARIO libros distintos, con varias sesiones cerradas en cada
+# uno y una abierta en algunos: así los índices parciales se distinguen para el planificador
+DATOS = [
+    "CREATE TEMP TABLE plan_usuario ON COMMIT DROP AS WITH nuevos AS ("
+    "  INSERT INTO usuario (usu_usuario, usu_apellido, usu_correo, usu_clave, usu_verificado, usu_fecharegistro)"
+    "  SELECT 'plan' || i, 'plan', 'plan' || i || '@planes.invalid', 'x', true, now()"
+    "  FROM generate_series(1, :usuarios) i RETURNING usu_id"
+    ") SELECT row_number() OVER (ORDER BY usu_id) AS n, usu_id FROM nuevos",
+    "CREATE TEMP TABLE plan_libro ON COMMIT DROP AS WITH nuevos AS ("
+    "  INSERT INTO libro (lib_titulo, lib_estado, lib_fecha)"
+    "  SELECT 'plan ' || i, true, now() FROM generate_series(1, :libros) i RETURNING lib_id"
+    ") SELECT row_number() OVER (ORDER BY lib_id) - 1 AS n, lib_id FROM nuevos",
+    "CREATE TEMP TABLE plan_lectura ON COMMIT DROP AS"
+    "  SELECT u.usu_id, l.lib_id, j FROM plan_usuario u"
+    "  CROSS JOIN generate_series(0, :por_usuario - 1) j"
+    "  JOIN plan_libro l ON l.n = (u.n + j) % :libros",
+    "INSERT INTO compra (com_idusuario, com_idlibro, com_fecha, com_estado)"
+    "  SELECT usu_id, lib_id, now() - j * interval '30 days', CASE WHEN j = 0 THEN 'pendiente' ELSE 'approved' END"
+    "  FROM plan_lectura",
+    "INSERT INTO progreso_lectura (pro_idusuario, pro_idlibro) SELECT usu_id, lib_id FROM plan_lectura",
+    "INSERT INTO lectura_sesion (ls_idusuario, ls_idlibro, ls_fecha_inicial, ls_fecha_final, ls_ultima_actividad)"
+    "  SELECT usu_id, lib_id, now(), CASE WHEN j = 0 AND s = 0 THEN NULL ELSE now() END, now()"
+    "  FROM plan_lectura CROSS JOIN generate_series(0, 3) s",
+]
+
+
+@pytest.fixture(scope="module")
+def sesion():
+    with Session(engine) as session:
+        for sentencia in DATOS:
+            session.exec(text(sentencia), params={
+                "usuarios": USUARIOS, "libros": LIBROS, "por_usuario": LIBROS_POR_USUARIO,
+            })
+        preparar(session)
+        usuario, libro = session.exec(text("SELECT usu_id, lib_id FROM plan_lectura WHERE j = 0 LIMIT 1")).one()
+        yield session, usuario, libro
+        session.rollback()
+
+
+@pytest.mark.parametrize("numero", range(len(consultas())), ids=[c[0] for c in consultas()])
+def test_consulta_usa_su_indice(sesion, numero):
+    session, usuario, libro = sesion
+    _, consulta, indice = consultas(usuario, libro)[numero]
+    assert indice in indices_usados(session, consulta)
@@ -12,10 +12,14 @@ import "./lector.css";
 import {
   iniciarSesionLectura,
   finalizarSesionLectura,
+  enviarLatido,
 } from "../../servicios/sesionesLectura";
 
 import { progresoAPI } from "../../servicios/progresoAPI";
 
+// Cada cuánto se avisa al servidor que la sesión sigue abierta (muy por debajo de LECTURA_INACTIVIDAD_MINUTOS)
+const INTERVALO_LATIDO_MS = 60 * 1000;
+
 /**
  * Componente principal del lector de PDF con sistema de anotaciones
  */
@@ -100,8 +104,8 @@ const LectorPDF = ({ libroId: libroIdProp }) => {
   }, [zoom, obtenerZoomInicial]);
 
   /**
-   * Inicia una sesión de lectura al montar el componente
-   * y la finaliza al desmontar
+   * Inicia una sesión de lectura al montar el componente, envía latidos
+   * mientras está abierta y la finaliza al desmontar
    */
   useEffect(() => {
     const iniciarSesion = async () => {
@@ -119,8 +123,17 @@ const LectorPDF = ({ libroId: libroIdProp }) => {
 
     iniciarSesion();
 
+    const latido = setInterval(() => {
+      if (sesionLecturaIdRef.current) {
+        enviarLatido(sesionLecturaIdRef.current).catch((error) => {
+          console.error("Error al enviar latido de lectura:", error);
+        });
+      }
+    }, INTERVALO_LATIDO_MS);
+
     // Cleanup: Finalizar sesión al desmontar
     return () => {
+      clearInterval(latido);
       if (sesionLecturaIdRef.current) {
         finalizarSesionLectura(sesionLecturaIdRef.current)
           .then(() => {
@@ -312,7 +325,9 @@ const LectorPDF = ({ libroId: libroIdProp }) => {
         setLibro(libroData);
 
         if (libroData.url) {
-          setPdfUrl(libroData.url);
+          // El PDF se sirve solo a quien compró el libro: pdf.js envía el token en cada petición (incluidos los rangos)
+          const token = localStorage.getItem("access_token");
+          setPdfUrl({ url: libroData.url, httpHeaders: { Authorization: `Bearer ${token}` } });
         }
       } catch (err) {
         setError("Error al cargar el libro. Verifica que tengas acceso.");
@@ -11,3 +11,8 @@ export const finalizarSesionLectura = async (sesionId) => {
   const res = await api.post(`/lecturas/finalizar/${sesionId}`);
   return res.data;
 };
+
+// Avisa que la sesión sigue activa; sin latidos el servidor la cierra por inactividad
+export const enviarLatido = async (sesionId) => {
+  await api.post(`/lecturas/latido/${sesionId}`);
+};